@@ -2,19 +2,31 @@
 import asyncio
 import logging
 import operator
-from datetime import datetime, timedelta  
+import random
+import time
+from datetime import datetime, timedelta
+from functools import partial
 from dateutil.tz import tzoffset
 from typing import Optional
 
 import voluptuous as vol
-from pymodbus.client import ModbusTcpClient
+from pymodbus.exceptions import ModbusException
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_NAME,
+    CONF_HOST,
+    CONF_PORT,
+    CONF_SCAN_INTERVAL,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
 from homeassistant.core import callback
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
 from .const import (
     DOMAIN,
     DEFAULT_NAME,
@@ -23,15 +35,58 @@ from .const import (
     CONF_MODBUS_ADDRESS,
     CONF_READ_SCN,
     CONF_READ_SOCKET2,
+    CONF_MAX_IN_FLIGHT,
+    CONF_DEVICE_INFO,
+    DEVICE_INFO_KEYS,
     DEFAULT_READ_SCN,
     DEFAULT_READ_SOCKET2,
+    DEFAULT_MAX_IN_FLIGHT,
     VALID_TIME_S,
-    MAX_CURRENT_S,
-    CONTROL_PHASE_MODES
+    CONTROL_PHASE_MODES,
+    SOCKET_DERIVED_SENSORS,
+    POLL_GROUP_IDENTIFICATION,
+    POLL_GROUP_ENERGY,
+    POLL_GROUP_LIVE,
+    IDENTIFICATION_SCAN_INTERVAL,
+    ENERGY_SCAN_INTERVAL,
+    DATA_FLEET,
+    DATA_LEDGER,
+    LEDGER_FILE,
+    SERVICE_QUERY_SESSIONS,
+    FLEET_MAX_CONCURRENT_REQUESTS,
+    FLEET_MAX_CONCURRENT_STARTS,
+    FLEET_JITTER,
+    SCN_SHARE_MAX_AGE,
+    SITE_SOCKET_KEYS,
+    WRITE_DEBOUNCE,
+    STORAGE_VERSION,
+    STORAGE_SAVE_DELAY,
+    KEEPALIVE_MARGIN,
+    KEEPALIVE_MIN_INTERVAL,
+    KEEPALIVE_MAX_RETRIES,
+    TIMING_DEADBAND_RATIO,
+    TIMING_DEADBAND_MIN,
+    DIAGNOSTIC_KEYS,
+)
+from .connection import ModbusConnection, ConnectionUnavailable
+from .ledger import SessionLedger
+from .timing import PhaseTimings
+from .registers import (
+    registers_to_bytes,
+    plan_reads,
+    PRODUCT_IDENTIFICATION_BLOCK,
+    STATION_CLOCK_BLOCK,
+    STATION_STATUS_BLOCK,
+    SCN_BLOCK,
+    SOCKET_MEASUREMENT_BLOCK,
+    SOCKET_ENERGY_BLOCK,
+    SOCKET_STATUS_BLOCK,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+_UNSET = object()
+
 ALFEN_MODBUS_SCHEMA = vol.Schema(
     {
         vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
@@ -42,6 +97,9 @@ ALFEN_MODBUS_SCHEMA = vol.Schema(
         ): cv.positive_int,
         vol.Optional(CONF_READ_SCN, default=DEFAULT_READ_SCN): cv.boolean,
         vol.Optional(CONF_READ_SOCKET2, default=DEFAULT_READ_SOCKET2): cv.boolean,
+        vol.Optional(
+            CONF_MAX_IN_FLIGHT, default=DEFAULT_MAX_IN_FLIGHT
+        ): cv.positive_int,
         vol.Optional(
             CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL
         ): cv.positive_int,
@@ -52,12 +110,53 @@ CONFIG_SCHEMA = vol.Schema(
     {DOMAIN: vol.Schema({cv.slug: ALFEN_MODBUS_SCHEMA})}, extra=vol.ALLOW_EXTRA
 )
 
+QUERY_SESSIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("station"): cv.string,
+        vol.Optional("socket"): vol.All(vol.Coerce(int), vol.In([1, 2])),
+        vol.Optional("sessions", default=True): cv.boolean,
+    }
+)
+
 PLATFORMS = ["binary_sensor", "number", "select", "sensor"]
 
 
 async def async_setup(hass, config):
     """Set up the Alfen modbus component."""
     hass.data[DOMAIN] = {}
+    hass.data[DATA_FLEET] = AlfenFleet(hass)
+    ledger = hass.data[DATA_LEDGER] = SessionLedger(hass.config.path(LEDGER_FILE))
+
+    async def close_ledger(_event):
+        await hass.async_add_executor_job(ledger.close)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, close_ledger)
+
+    async def query_sessions(call: ServiceCall):
+        """Return the sessions that started in a date range, with totals per socket."""
+        # Naive datetimes are in the time zone configured in Home Assistant,
+        # not in the one of the operating system
+        start = dt_util.as_utc(call.data["start"]).timestamp()
+        end = dt_util.as_utc(call.data.get("end", dt_util.utcnow())).timestamp()
+        args = (start, end, call.data.get("station"), call.data.get("socket"))
+        response = {"totals": await hass.async_add_executor_job(ledger.aggregate, *args)}
+        if call.data["sessions"]:
+            sessions = await hass.async_add_executor_job(ledger.query, *args)
+            for session in sessions:
+                session["start"] = dt_util.utc_from_timestamp(session["start"]).isoformat()
+                session["stop"] = dt_util.utc_from_timestamp(session["stop"]).isoformat()
+            response["sessions"] = sessions
+        return response
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_SESSIONS,
+        query_sessions,
+        schema=QUERY_SESSIONS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
     return True
 
 
@@ -70,6 +169,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     scan_interval = entry.data[CONF_SCAN_INTERVAL]
     read_scn = entry.data.get(CONF_READ_SCN, False)
     read_socket2 = entry.data.get(CONF_READ_SOCKET2, False)
+    max_in_flight = entry.data.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT)
 
     _LOGGER.debug("Setup %s.%s", DOMAIN, name)
 
@@ -81,19 +181,52 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         address,
         scan_interval,
         read_scn,
-        read_socket2
+        read_socket2,
+        max_in_flight,
+        hass.data[DATA_FLEET],
     )
     """Register the hub."""
     hass.data[DOMAIN][name] = {"hub": hub}
+    hass.data[DATA_FLEET].add_hub(hub)
 
-    # Read device info before setting up platforms so device_info is available
-    hub.connect()
-    await hub.read_modbus_data()
-
+    # The platforms take the device info from the identification cached by
+    # the last run, the station is connected and polled in the background so
+    # an unreachable station does not hold up the start of Home Assistant.
+    # The entities start out with the data saved by the last run.
+    await hub.async_restore(Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}"))
+    hub.ledger = hass.data[DATA_LEDGER]
+    hub.data.update(entry.data.get(CONF_DEVICE_INFO, {}))
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_create_background_task(
+        hass, async_start_hub(hass, entry, hub), f"{DOMAIN} start {name}"
+    )
     return True
 
 
+async def async_start_hub(hass, entry, hub):
+    """Connect and poll a hub for the first time, then update the cached identification."""
+    fleet = hass.data[DATA_FLEET]
+    async with fleet.start_slots:
+        await hub.async_connect()
+        await hub.async_refresh_modbus_data()
+
+    cached = entry.data.get(CONF_DEVICE_INFO, {})
+    device_info = {**cached, **{key: hub.data[key] for key in DEVICE_INFO_KEYS if key in hub.data}}
+    if device_info == cached:
+        return
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_DEVICE_INFO: device_info}
+    )
+    registry = dr.async_get(hass)
+    device = registry.async_get_device(identifiers={(DOMAIN, hub.name)})
+    if device is not None:
+        registry.async_update_device(
+            device.id,
+            model=device_info.get("platformType", "Unknown"),
+            sw_version=device_info.get("firmwareVersion", "Unknown"),
+        )
+
+
 
 async def async_unload_entry(hass, entry):
     """Unload Alfen mobus entry."""
@@ -108,10 +241,19 @@ async def async_unload_entry(hass, entry):
     if not unload_ok:
         return False
 
-    hass.data[DOMAIN].pop(entry.data["name"])
+    hub = hass.data[DOMAIN].pop(entry.data["name"])["hub"]
+    await hub.async_save()
+    fleet = hass.data[DATA_FLEET]
+    fleet.remove_hub(hub)
+    fleet.async_remove_site_entry(entry.entry_id)
     return True
 
 
+async def async_remove_entry(hass, entry):
+    """Remove the data saved for the entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+
+
 def validate(value, comparison, against):
     ops = {
         ">": operator.gt,
@@ -126,6 +268,168 @@ def validate(value, comparison, against):
     return value
 
 
+class AlfenFleet:
+    """Schedules the polls of all Alfen hubs and aggregates the site data."""
+
+    # Site sensors are plain AlfenSensors with the fleet as their hub
+    has_socket_2 = False
+
+    def __init__(self, hass):
+        """Initialize the fleet."""
+        self._hass = hass
+        self._hubs = []
+        self._polls = 0
+        self.request_slots = asyncio.Semaphore(FLEET_MAX_CONCURRENT_REQUESTS)
+        self.start_slots = asyncio.Semaphore(FLEET_MAX_CONCURRENT_STARTS)
+        self._contributions = {}
+        self._listeners = {}
+        # Elected station and last read values by SCN, see scn_values
+        self._scn_readers = {}
+        self._scn_values = {}
+        # Entry that added the site sensors, and how each entry adds them
+        self.site_entry_id = None
+        self._site_entries = {}
+        self.data = {}
+
+    def add_hub(self, hub):
+        """Add a hub to the fleet."""
+        self._hubs.append(hub)
+
+    @callback
+    def remove_hub(self, hub):
+        """Remove a hub and its share of the site data."""
+        if hub in self._hubs:
+            self._hubs.remove(hub)
+        for scn, reader in list(self._scn_readers.items()):
+            if reader is hub:
+                del self._scn_readers[scn]
+                self._scn_values.pop(scn, None)
+        if self._contributions.pop(hub, None) is not None:
+            self._async_update_site()
+
+    @callback
+    def async_add_site_entry(self, entry_id, add_site_sensors):
+        """Register how an entry adds the site sensors, the first entry adds them."""
+        self._site_entries[entry_id] = add_site_sensors
+        if self.site_entry_id is None:
+            self.site_entry_id = entry_id
+            add_site_sensors()
+
+    @callback
+    def async_remove_site_entry(self, entry_id):
+        """Forget an unloaded entry, its site sensors move to a remaining entry."""
+        self._site_entries.pop(entry_id, None)
+        if self.site_entry_id != entry_id:
+            return
+        self.site_entry_id = None
+        for other_id, add_site_sensors in self._site_entries.items():
+            self.site_entry_id = other_id
+            add_site_sensors()
+            break
+
+    def scn_values(self, hub, scn, max_age):
+        """Return the SCN values read by the elected station of the network.
+
+        scn identifies the network by its name and number of sockets. The
+        first hub asking becomes the elected station, another hub takes over
+        when its reads fail. Returns None when the hub has to read the SCN
+        registers itself, because it is elected or the values are older than
+        max_age seconds.
+        """
+        reader = self._scn_readers.get(scn)
+        if reader is None or reader is hub or reader.is_stale("scnName"):
+            self._scn_readers[scn] = hub
+            return None
+        read, values = self._scn_values.get(scn, (None, None))
+        if read is None or time.monotonic() - read > max_age:
+            return None
+        return values
+
+    def publish_scn_values(self, hub, scn, values):
+        """Share the SCN values the elected station read."""
+        if self._scn_readers.get(scn) is hub:
+            self._scn_values[scn] = (time.monotonic(), values)
+
+    @callback
+    def async_track_poll(self, action, interval):
+        """Call action every interval, at a phase staggered against earlier polls.
+
+        Returns a function that stops the polls.
+        """
+        # Multiples of the golden ratio spread any number of polls evenly over
+        # the interval, the jitter keeps restarted hubs from lining up again.
+        phase = (self._polls * 0.618034) % 1 + random.uniform(0, FLEET_JITTER)
+        self._polls += 1
+        unsub = None
+
+        @callback
+        def start(_now):
+            nonlocal unsub
+            unsub = async_track_time_interval(self._hass, action, interval)
+            self._hass.async_create_task(action())
+
+        unsub = async_call_later(self._hass, interval.total_seconds() * phase, start)
+
+        def stop():
+            unsub()
+
+        return stop
+
+    @callback
+    def async_subscribe(self, key, update_callback):
+        """Listen for changes of a site key, returns a function that removes the listener."""
+        self._listeners.setdefault(key, set()).add(update_callback)
+        return partial(self._async_unsubscribe, key, update_callback)
+
+    @callback
+    def _async_unsubscribe(self, key, update_callback):
+        listeners = self._listeners.get(key)
+        if listeners:
+            listeners.discard(update_callback)
+
+    def is_stale(self, key):
+        """Site data is never stale, a failing charger just drops out of the sums."""
+        return False
+
+    def wanted_socket_keys(self):
+        """Return the socket keys the site sensors in use are summed from."""
+        return {
+            f"socket_{socket}_{SITE_SOCKET_KEYS[site_key]}"
+            for site_key, listeners in self._listeners.items()
+            if listeners
+            for socket in (1, 2)
+        }
+
+    @callback
+    def async_hub_updated(self, hub):
+        """Recompute the share of a hub in the site data after it was polled."""
+        sockets = (1, 2) if hub.has_socket_2 else (1,)
+        contribution = {}
+        for site_key, socket_key in SITE_SOCKET_KEYS.items():
+            total = 0
+            for socket in sockets:
+                key = f"socket_{socket}_{socket_key}"
+                value = hub.data.get(key)
+                if value is not None and value == value and not hub.is_stale(key):
+                    total += value
+            contribution[site_key] = total
+        if self._contributions.get(hub) != contribution:
+            self._contributions[hub] = contribution
+            self._async_update_site()
+
+    @callback
+    def _async_update_site(self):
+        """Sum the hub shares and notify the listeners of changed site keys."""
+        callbacks = set()
+        for site_key in SITE_SOCKET_KEYS:
+            value = round(sum(share[site_key] for share in self._contributions.values()), 2)
+            if self.data.get(site_key) != value:
+                self.data[site_key] = value
+                callbacks.update(self._listeners.get(site_key, ()))
+        for update_callback in callbacks:
+            update_callback()
+
+
 class AlfenModbusHub:
     """Async-safe wrapper class for pymodbus."""
 
@@ -138,68 +442,239 @@ class AlfenModbusHub:
         address,
         scan_interval,
         read_scn=False,
-        read_socket_2=False
+        read_socket_2=False,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        fleet=None,
     ):
         """Initialize the Modbus hub."""
         self._hass = hass
-        self._client = ModbusTcpClient(host=host, port=port)
-        self._lock = asyncio.Lock()
+        self._fleet = fleet
+        self.timings = PhaseTimings()
+        self._connection = ModbusConnection(
+            hass,
+            host,
+            port,
+            max_in_flight,
+            fleet.request_slots if fleet is not None else None,
+            self.timings,
+        )
+        self._client = self._connection.client
         self._name = name
         self._address = address
         self.read_scn = read_scn
         self.read_socket_2 = read_socket_2
         self._refreshInterval = scan_interval
         self._scan_interval = timedelta(seconds=scan_interval)
+        self._poll_intervals = {
+            POLL_GROUP_IDENTIFICATION: IDENTIFICATION_SCAN_INTERVAL,
+            POLL_GROUP_ENERGY: max(ENERGY_SCAN_INTERVAL, scan_interval),
+            POLL_GROUP_LIVE: scan_interval,
+        }
+        self._last_poll = {}
+        # Held by the running poll, see async_refresh_modbus_data
+        self._poll_lock = asyncio.Lock()
+        self._due_groups = set(self._poll_intervals)
+        self._wanted = None
+        # Raw bytes of the last read of each (unit, block), with the number
+        # of reads that were unchanged (hits) and decoded (misses)
+        self._snapshots = {}
+        self._block_stats = {}
+        # Register reads that are done as a whole, with the data keys they
+        # provide. A read that fails is retried on the next poll and its keys
+        # are reported stale, the other reads are still published.
+        self._read_keys = {
+            "product": PRODUCT_IDENTIFICATION_BLOCK.keys() + ("stationTime", "lastBoot"),
+            "station": STATION_STATUS_BLOCK.keys(),
+            "scn": SCN_BLOCK.keys(),
+        }
+        for socket in (1, 2):
+            self._read_keys[f"socket_{socket}"] = (
+                SOCKET_MEASUREMENT_BLOCK.keys(socket)
+                + SOCKET_ENERGY_BLOCK.keys(socket)
+                + SOCKET_STATUS_BLOCK.keys(socket)
+                + tuple(row[2].format(socket) for row in SOCKET_DERIVED_SENSORS)
+                + (f"usephases_S{socket}",)
+            )
+        self._key_reads = {
+            key: read for read, keys in self._read_keys.items() for key in keys
+        }
+        self._last_update = {}
+        self._stale = set()
         self._unsub_interval_method = None
-        self._sensors = []    
-        self._inputs = []    
+        self._listeners = {}
+        self._listener_count = 0
+        self._inputs = {}
+        self._dirty = set()
+        # Register writes by (unit, address), see async_queue_write
+        self._pending_writes = {}
+        self._acked_writes = {}
+        self._write_tasks = {}
+        # Max current keepalive by socket, see _async_schedule_keepalive
+        self._keepalive_timers = {}
+        self._keepalive_deadlines = {}
+        self._keepalive_pending = {}
+        self._last_keepalive = {}
+        self._keepalive_retries = {}
+        # Saves the data between runs, see async_restore
+        self._store = None
+        self._last_save = None
+        # Sockets with session anchors from the last run, see _verify_restored_session
+        self._restored_sessions = set()
+        # Finished charging sessions are recorded here, see SessionLedger
+        self.ledger = None
         self.data = {}
 
     @callback
-    def async_add_alfen_sensor(self, update_callback, refresh_callback = None):
-        """Listen for data updates."""
+    def async_subscribe(self, key, update_callback):
+        """Listen for changes of a data key, None listens to every poll.
+
+        Returns a function that removes the listener.
+        """
+        listeners = self._listeners.setdefault(key, set())
+        if update_callback in listeners:
+            return partial(self._async_unsubscribe, key, update_callback)
         # This is the first sensor, set up interval.
-        if not self._sensors:
-            self.connect()
-            self._unsub_interval_method = async_track_time_interval(
-                self._hass, self.async_refresh_modbus_data, self._scan_interval
-            )
-            # Schedule initial data read as a task (non-blocking)
-            self._hass.async_create_task(self.read_modbus_data())
+        if not self._listener_count:
+            if self._fleet is not None:
+                # The fleet does the first poll at this hub's staggered phase
+                self._unsub_interval_method = self._fleet.async_track_poll(
+                    self.async_refresh_modbus_data, self._scan_interval
+                )
+            else:
+                self._unsub_interval_method = async_track_time_interval(
+                    self._hass, self.async_refresh_modbus_data, self._scan_interval
+                )
+                # Schedule initial data read as a task (non-blocking)
+                self._hass.async_create_task(self.async_refresh_modbus_data())
 
-        self._sensors.append(update_callback)
-        if refresh_callback is not None:
-           self._inputs.append(refresh_callback)
+        listeners.add(update_callback)
+        self._listener_count += 1
+        return partial(self._async_unsubscribe, key, update_callback)
 
     @callback
-    def async_remove_alfen_sensor(self, update_callback, refresh_callback = None):
-        """Remove data update."""
-        self._sensors.remove(update_callback)
-        if refresh_callback is not None:
-           self._inputs.remove(refresh_callback)
-        if not self._sensors:
+    def _async_unsubscribe(self, key, update_callback):
+        """Remove a listener added by async_subscribe."""
+        listeners = self._listeners.get(key)
+        if not listeners or update_callback not in listeners:
+            return
+        listeners.remove(update_callback)
+        if not listeners:
+            del self._listeners[key]
+        self._listener_count -= 1
+        if not self._listener_count:
             """stop the interval timer upon removal of last sensor"""
             self._unsub_interval_method()
             self._unsub_interval_method = None
+            for cancel in self._keepalive_timers.values():
+                cancel()
+            self._keepalive_timers.clear()
             self.close()
 
+    @callback
+    def async_add_alfen_sensor(self, update_callback, refresh_callback = None, key = None, socket = None):
+        """Listen for data updates, see async_subscribe.
+
+        refresh_callback rewrites the max current setpoint of the socket, it
+        is called by the keepalive before the setpoint expires.
+        """
+        self.async_subscribe(key, update_callback)
+        if refresh_callback is not None:
+           self._inputs[refresh_callback] = socket
 
+    @callback
+    def async_remove_alfen_sensor(self, update_callback, refresh_callback = None, key = None):
+        """Remove data update."""
+        if refresh_callback is not None:
+           self._inputs.pop(refresh_callback, None)
+        self._async_unsubscribe(key, update_callback)
+
+    @callback
+    def _async_dispatch(self, keys):
+        """Call the listeners of the changed keys and the listeners of every poll."""
+        callbacks = set(self._listeners.get(None, ()))
+        for key in keys:
+            listeners = self._listeners.get(key)
+            if listeners:
+                callbacks.update(listeners)
+        for update_callback in callbacks:
+            update_callback()
 
     async def async_refresh_modbus_data(self, _now: Optional[int] = None) -> None:
         """Time to update."""
-        if not self._sensors:
+        if not self._listener_count:
             return
+        if self._poll_lock.locked():
+            # The poll at the start of the entry can overlap the first
+            # scheduled one, wait for the running poll instead of polling twice
+            async with self._poll_lock:
+                return
 
-        try:
-            update_result = await self.read_modbus_data()
-        except Exception as e:
-            _LOGGER.exception("Error reading modbus data")
-            update_result = False
+        async with self._poll_lock:
+            try:
+                update_result = await self.read_modbus_data()
+            except Exception:
+                _LOGGER.exception("Error reading modbus data")
+                update_result = False
+
+            if update_result or self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                with self.timings.measure("dispatch"):
+                    self._async_dispatch(dirty)
+                if self._fleet is not None:
+                    self._fleet.async_hub_updated(self)
+                if dirty - DIAGNOSTIC_KEYS:
+                    self._async_schedule_save()
+
+    async def async_restore(self, store):
+        """Restore the data saved by the last run, later polls save to the store."""
+        self._store = store
+        saved = await store.async_load()
+        if not saved:
+            return
+        self.data.update(saved["data"])
+        for key, value in saved["times"].items():
+            self.data[key] = datetime.fromisoformat(value)
+        for key, value in saved["durations"].items():
+            self.data[key] = timedelta(seconds=value)
+        self._restored_sessions = {
+            socket for socket in (1, 2) if self.data.get(f"socket_{socket}_carcharging") == 1
+        }
+
+    def snapshot(self):
+        """Return the data in the form it is saved in.
 
-        if update_result:
-            for update_callback in self._sensors:
-                update_callback()
-            self.refresh_max_current()
+        Datetimes and durations are kept apart, as ISO strings and seconds.
+        NaN and other values that do not survive JSON are left out, and so
+        are the timings of this run.
+        """
+        data = {}
+        times = {}
+        durations = {}
+        for key, value in self.data.items():
+            if key in DIAGNOSTIC_KEYS:
+                continue
+            if isinstance(value, datetime):
+                times[key] = value.isoformat()
+            elif isinstance(value, timedelta):
+                durations[key] = value.total_seconds()
+            elif isinstance(value, (str, int)) or (isinstance(value, float) and value == value):
+                data[key] = value
+        return {"data": data, "times": times, "durations": durations}
+
+    @callback
+    def _async_schedule_save(self):
+        """Save the data after the save delay, unless a save is already pending."""
+        if self._store is None:
+            return
+        now = time.monotonic()
+        if self._last_save is None or now - self._last_save >= STORAGE_SAVE_DELAY:
+            self._last_save = now
+            self._store.async_delay_save(self.snapshot, STORAGE_SAVE_DELAY)
+
+    async def async_save(self):
+        """Save the data right away."""
+        if self._store is not None:
+            await self._store.async_save(self.snapshot())
 
     @property
     def name(self):
@@ -208,32 +683,24 @@ class AlfenModbusHub:
 
     def close(self):
         """Disconnect client."""
-        self._client.close()
+        self._connection.close()
 
-    def connect(self):
+    async def async_connect(self):
         """Connect client."""
-        self._client.connect()
+        return await self._connection.connect()
 
-    def _ensure_connected(self):
-        """Ensure the modbus client is connected, reconnect if necessary.
-        Must be called while holding self._lock."""
-        try:
-            # Check if socket is open (method may vary by pymodbus version)
-            is_open = getattr(self._client, 'is_socket_open', None)
-            if is_open and not is_open():
-                _LOGGER.debug("Modbus connection lost, reconnecting...")
-                try:
-                    self._client.close()
-                except Exception:
-                    pass  # Ignore errors when closing
-                self._client.connect()
-                # Verify reconnection
-                if is_open and not is_open():
-                    raise ConnectionError("Failed to reconnect to modbus device")
-        except AttributeError:
-            # If is_socket_open doesn't exist, just try to connect
-            # The actual read/write will catch connection errors
-            pass
+    @property
+    def block_stats(self):
+        """Return the unchanged (hits) and decoded (misses) reads per register block."""
+        return {
+            f"{unit}:{block.start}+{block.count}": {"hits": hits, "misses": misses}
+            for (unit, block), (hits, misses) in self._block_stats.items()
+        }
+
+    @property
+    def connection_state(self):
+        """Return the state of the modbus connection."""
+        return self._connection.state
 
     @property
     def has_socket_2(self):
@@ -245,239 +712,529 @@ class AlfenModbusHub:
         """Return true if a battery is available"""
         return self.read_scn
 
+    async def _execute(self, request, **kwargs):
+        """Run a client request, see ModbusConnection.execute."""
+        return await self._connection.execute(request, **kwargs)
+
     async def read_holding_registers(self, unit, address, count):
         """Read holding registers."""
-        try:
-            async with self._lock:
-                self._ensure_connected()
-                return await self._hass.async_add_executor_job(
-                    lambda: self._client.read_holding_registers(address=address, count=count, device_id=unit)
-                )
-        except (BrokenPipeError, ConnectionError, OSError) as e:
-            _LOGGER.warning("Connection error during read, attempting reconnect: %s", e)
-            # Try to reconnect once
-            try:
-                async with self._lock:
-                    try:
-                        self._client.close()
-                    except Exception:
-                        pass
-                    self._client.connect()
-                    return await self._hass.async_add_executor_job(
-                        lambda: self._client.read_holding_registers(address=address, count=count, device_id=unit)
-                    )
-            except Exception as retry_error:
-                _LOGGER.error("Failed to reconnect and retry read: %s", retry_error)
-                raise
+        return await self._execute(
+            "read_holding_registers", address=address, count=count, device_id=unit
+        )
 
     async def write_registers(self, unit, address, payload):
         """Write registers."""
+        return await self._execute(
+            "write_registers", address=address, values=payload, device_id=unit
+        )
+
+    @callback
+    def async_queue_write(self, unit, address, payload, force=False):
+        """Queue a register write.
+
+        Writes to the same register within WRITE_DEBOUNCE are coalesced, only
+        the latest value is written. A value equal to the last acknowledged
+        write is skipped unless force is set, the station needs the max
+        current rewritten before its valid time runs out. The acknowledged
+        value is forgotten when a read shows the register changed since.
+        """
+        key = (unit, address)
+        payload = tuple(payload)
+        if not force and key not in self._pending_writes and self._acked_writes.get(key) == payload:
+            return
+        self._pending_writes[key] = payload
+        if key not in self._write_tasks:
+            self._write_tasks[key] = self._hass.async_create_task(self._async_flush_writes(key))
+
+    async def _async_flush_writes(self, key):
+        """Write the latest queued value of a register, then re-read what it changed."""
+        unit, address = key
+        failed = False
+        try:
+            await asyncio.sleep(WRITE_DEBOUNCE)
+            while key in self._pending_writes:
+                payload = self._pending_writes.pop(key)
+                try:
+                    result = await self.write_registers(unit, address, list(payload))
+                except (ModbusException, OSError) as e:
+                    _LOGGER.warning("Writing register %s of unit %s failed: %s", address, unit, e)
+                    failed = True
+                else:
+                    failed = result.isError()
+                    if failed:
+                        _LOGGER.warning("Writing register %s of unit %s failed: %s", address, unit, result)
+                if failed:
+                    # A value queued while this write was in flight is still
+                    # written, there is no other task to pick it up.
+                    self._write_failed(key)
+                    continue
+                self._acked_writes[key] = payload
+        finally:
+            del self._write_tasks[key]
+        if failed:
+            return
+
+        if SOCKET_STATUS_BLOCK.start <= address < SOCKET_STATUS_BLOCK.start + SOCKET_STATUS_BLOCK.count:
+            await self.async_refresh_socket_status(unit)
+        else:
+            await self.async_refresh_modbus_data()
+
+    def _write_failed(self, key):
+        """Forget what is known about a register after its write failed."""
+        self._acked_writes.pop(key, None)
+        # The entity already shows the new value, decode the next read of
+        # the unit even if its registers did not change.
+        for snapshot in [snapshot for snapshot in self._snapshots if snapshot[0] == key[0]]:
+            del self._snapshots[snapshot]
+
+    async def async_refresh_socket_status(self, socket):
+        """Re-read the status block of a socket and publish the changes."""
         try:
-            async with self._lock:
-                self._ensure_connected()
-                return await self._hass.async_add_executor_job(
-                    lambda: self._client.write_registers(address=address, values=payload, device_id=unit)
+            await self._read_blocks(
+                socket,
+                [(SOCKET_STATUS_BLOCK, partial(self.update_socket_status, socket))],
+                partial(self.update_socket_derived_data, socket),
+            )
+        except (ModbusException, OSError) as e:
+            _LOGGER.debug("Reading the status of socket %s failed: %s", socket, e)
+            return
+        dirty, self._dirty = self._dirty, set()
+        self._async_dispatch(dirty)
+
+    def update_socket_status(self, socket, raw, read_start=None):
+        """Decode the status block of a socket and reschedule its keepalive."""
+        self.update_data_from_block(SOCKET_STATUS_BLOCK, raw, read_start, socket)
+        self._async_schedule_keepalive(socket, time.monotonic())
+
+    @callback
+    def _async_schedule_keepalive(self, socket, read_time):
+        """Schedule the max current rewrite ahead of the valid time read at read_time.
+
+        The keepalive runs on its own timer, so the setpoint is refreshed even
+        when the polls in between fail.
+        """
+        valid_time = self.data.get(VALID_TIME_S + str(socket))
+        if valid_time is None or socket not in self._inputs.values():
+            return
+        deadline = read_time + valid_time
+        pending = self._keepalive_pending.get(socket)
+        if pending is not None and valid_time > 0 and deadline > pending + 1:
+            # The rewrite extended the valid time, record how close it was.
+            # A valid time stuck at 0 moves the deadline along with the
+            # reads, that is not an extension.
+            del self._keepalive_pending[socket]
+            self._keepalive_retries.pop(socket, None)
+            prefix = f"socket_{socket}_"
+            margin = round(pending - read_time, 1)
+            if margin < 0:
+                _LOGGER.warning("Max current of socket %s expired %s s before it was refreshed", socket, -margin)
+            self.set_data(prefix + "keepaliveMargin", margin)
+            self.set_data(prefix + "keepaliveMarginMin", min(margin, self.data.get(prefix + "keepaliveMarginMin", margin)))
+        self._keepalive_deadlines[socket] = deadline
+
+        now = time.monotonic()
+        due = max(deadline - KEEPALIVE_MARGIN, self._last_keepalive.get(socket, 0) + self._keepalive_interval(socket))
+        cancel = self._keepalive_timers.pop(socket, None)
+        if cancel is not None:
+            cancel()
+        self._keepalive_timers[socket] = async_call_later(
+            self._hass, max(0, due - now), partial(self._async_keepalive, socket)
+        )
+
+    @callback
+    def _async_keepalive(self, socket, _now=None):
+        """Rewrite the max current setpoint of a socket."""
+        self._keepalive_timers.pop(socket, None)
+        now = time.monotonic()
+        self._last_keepalive[socket] = now
+        self._keepalive_pending.setdefault(socket, self._keepalive_deadlines[socket])
+        for refresh_callback, refresh_socket in list(self._inputs.items()):
+            if refresh_socket != socket:
+                continue
+            # Schedule async callbacks as tasks
+            result = refresh_callback()
+            if asyncio.iscoroutine(result):
+                self._hass.async_create_task(result)
+        # Try again if the write does not get through, a status read after
+        # the write reschedules the keepalive from the new valid time.
+        retries = self._keepalive_retries[socket] = self._keepalive_retries.get(socket, 0) + 1
+        if retries >= KEEPALIVE_MAX_RETRIES:
+            if retries == KEEPALIVE_MAX_RETRIES:
+                _LOGGER.warning(
+                    "Max current of socket %s was rewritten %s times without extending its valid time",
+                    socket, retries,
                 )
-        except (BrokenPipeError, ConnectionError, OSError) as e:
-            _LOGGER.warning("Connection error during write, attempting reconnect: %s", e)
-            # Try to reconnect once
-            try:
-                async with self._lock:
-                    try:
-                        self._client.close()
-                    except Exception:
-                        pass
-                    self._client.connect()
-                    return await self._hass.async_add_executor_job(
-                        lambda: self._client.write_registers(address=address, values=payload, device_id=unit)
-                    )
-            except Exception as retry_error:
-                _LOGGER.error("Failed to reconnect and retry write: %s", retry_error)
-                raise
-            
-    def refresh_max_current(self):
-        # Guard against KeyError if data hasn't been populated yet
-        key1 = VALID_TIME_S + "1"
-        key2 = VALID_TIME_S + "2"
-        if key1 not in self.data:
             return
-        if int(self.data[key1]) < self._refreshInterval+10 or (self.has_socket_2 and key2 in self.data and int(self.data[key2]) < self._refreshInterval+10):
-            for update_callback in self._inputs:
-                # Schedule async callbacks as tasks
-                result = update_callback()
-                if asyncio.iscoroutine(result):
-                    self._hass.async_create_task(result)
-            
-            
+        self._keepalive_timers[socket] = async_call_later(
+            self._hass, self._keepalive_interval(socket), partial(self._async_keepalive, socket)
+        )
 
-    async def read_modbus_data(self):
-        return (
-            await self.read_modbus_data_product()
-            and await self.read_modbus_data_station()
-            and await self.read_modbus_data_scn()
-            and await self.read_modbus_data_socket(1)
-            and await self.read_modbus_data_socket(2)            
+    def _keepalive_interval(self, socket):
+        """Return the minimum time between rewrites, doubling with every rewrite that did not get through."""
+        retries = self._keepalive_retries.get(socket, 0)
+        return min(
+            KEEPALIVE_MIN_INTERVAL * 2 ** max(0, retries - 1),
+            max(KEEPALIVE_MIN_INTERVAL, self._refreshInterval),
         )
 
-    def decode_string(self, decoder,length):
-        s = decoder.decode_string(length*2)  # get 32 char string
-        s = s.partition(b"\0")[0]  # omit NULL terminators
-        s = s.decode("utf-8")  # decode UTF-8
-        return str(s)
+    def set_data(self, key, value, deadband=None):
+        """Store a value, marking the key dirty when it changed.
 
-    def decode_from_registers(self, registers, offset, count, data_type):
-        return self._client.convert_from_registers(registers[offset:offset+count], data_type=data_type, word_order='big')
+        A change smaller than the deadband is ignored, the previous value is
+        kept so slow drift still gets published once it exceeds the deadband.
+        """
+        old = self.data.get(key, _UNSET)
+        if old is not _UNSET:
+            if old == value or (old != old and value != value):  # unchanged, or NaN twice
+                return
+            if deadband is not None and old == old and abs(value - old) < deadband:
+                return
+        self.data[key] = value
+        self._dirty.add(key)
 
-    async def read_modbus_data_station(self):
-        status_data = await self.read_holding_registers(self._address,1100,6)
-        if status_data.isError():
-            return False
-    
-        self.data["actualMaxCurrent"] =  round(self.decode_from_registers(status_data.registers,0,2,self._client.DATATYPE.FLOAT32),2)
-        self.data["boardTemperature"] =  round(self.decode_from_registers(status_data.registers,2,2,self._client.DATATYPE.FLOAT32),2)
-        self.data["backofficeConnected"] = self.decode_from_registers(status_data.registers,4,1,self._client.DATATYPE.UINT16)
-        self.data["numberOfSockets"] = self.decode_from_registers(status_data.registers,5,1,self._client.DATATYPE.UINT16)
+    def update_data_from_block(self, block, raw, read_start=None, socket=None):
+        """Decode a register block and store its fields."""
+        for key, value, deadband in zip(block.keys(socket), block.values(raw, read_start), block.deadbands):
+            self.set_data(key, value, deadband)
+
+    def _due_poll_groups(self):
+        """Return the register groups whose scan interval has elapsed."""
+        now = time.monotonic()
+        # Allow half a scan interval of timer jitter, otherwise a group that is
+        # due on every other tick is read one tick late.
+        slack = self._refreshInterval / 2
+        return {
+            group
+            for group, interval in self._poll_intervals.items()
+            if group not in self._last_poll or now - self._last_poll[group] >= interval - slack
+        }
+
+    def is_stale(self, key):
+        """Return true if the last read of the key failed."""
+        return self._key_reads.get(key) in self._stale
+
+    def last_update(self, read):
+        """Return the monotonic time of the last successful read, or None."""
+        return self._last_update.get(read)
+
+    async def _read(self, read, reader, *args):
+        """Run a register read, tracking its staleness.
+
+        Returns False instead of raising when the read fails.
+        """
+        try:
+            result = await reader(*args)
+        except ConnectionUnavailable as e:
+            _LOGGER.debug("Skipped reading %s: %s", read, e)
+            result = False
+        except (ModbusException, OSError) as e:
+            _LOGGER.warning("Reading %s failed: %s", read, e)
+            result = False
+        if result:
+            self._last_update[read] = time.monotonic()
+            if read in self._stale:
+                self._stale.discard(read)
+                self._dirty.update(self._read_keys[read])
+        elif read not in self._stale:
+            self._stale.add(read)
+            # Let the entities of this read report their staleness
+            self._dirty.update(self._read_keys[read])
+        return result
+
+    def _wanted_keys(self):
+        """Return the data keys the entities listen to, None for all keys.
+
+        Until the entities are added everything is read.
+        """
+        if not self._listeners:
+            return None
+        # Keeps the cached device info up to date, see async_start_hub
+        wanted = set(self._listeners) | set(DEVICE_INFO_KEYS)
+        for socket in (1, 2):
+            # Needed to track the charging sessions
+            wanted.add(f"socket_{socket}_realEnergyDeliveredSum")
+            for phase in ("L1", "L2", "L3"):
+                wanted.add(f"socket_{socket}_current{phase}")
+        if self._fleet is not None:
+            wanted.update(self._fleet.wanted_socket_keys())
+        return wanted
+
+    async def _read_blocks(self, unit, parts, changed=None):
+        """Read register blocks of a unit with as few requests as possible.
+
+        parts is a list of (block, decode) tuples, decode is called with the
+        raw bytes of the request and the register it started at. A block
+        whose bytes are the same as the last time is not decoded again.
+        changed is called once after any block was decoded.
+        """
+        decoded = False
+        for start, count, members in plan_reads(parts):
+            response = await self.read_holding_registers(unit, start, count)
+            if response.isError():
+                return False
+            self._check_acked_writes(unit, start, response.registers)
+            raw = registers_to_bytes(response.registers)
+            for block, decode in members:
+                offset = (block.start - start) * 2
+                block_raw = raw[offset:offset + block.count * 2]
+                stats = self._block_stats.get((unit, block))
+                if stats is None:
+                    stats = self._block_stats[(unit, block)] = [0, 0]
+                if self._snapshots.get((unit, block)) == block_raw:
+                    stats[0] += 1
+                    continue
+                stats[1] += 1
+                self._snapshots[(unit, block)] = block_raw
+                with self.timings.measure("decode"):
+                    decode(raw, start)
+                decoded = True
+        if decoded and changed is not None:
+            changed()
         return True
-        
+
+    def _check_acked_writes(self, unit, start, registers):
+        """Forget acknowledged writes the registers read back no longer hold.
+
+        Another client or the station itself may have changed the register
+        since, the same value has to be written again then.
+        """
+        for key, payload in list(self._acked_writes.items()):
+            offset = key[1] - start
+            if key[0] != unit or offset < 0 or offset + len(payload) > len(registers):
+                continue
+            if tuple(registers[offset:offset + len(payload)]) != payload:
+                del self._acked_writes[key]
+
+    async def read_modbus_data(self):
+        """Read all register groups, returns true if any read succeeded."""
+        self._due_groups = self._due_poll_groups()
+        self._wanted = self._wanted_keys()
+        polled = time.monotonic()
+        started = time.perf_counter()
+        # The station unit and the socket units are independent, read them
+        # concurrently. Requests share the connection pool, so with a single
+        # connection they are still sent one at a time.
+        station_read = asyncio.ensure_future(self.read_modbus_data_station_unit())
+
+        async def read_socket(socket):
+            if (socket == 2 and "numberOfSockets" not in self.data) or socket in self._restored_sessions:
+                # The station block tells whether there is a second socket,
+                # the clock whether a restored session is still running
+                await asyncio.wait([station_read])
+            return await self._read(f"socket_{socket}", self.read_modbus_data_socket, socket)
+
+        results = await asyncio.gather(station_read, read_socket(1), read_socket(2))
+        if self._stale:
+            _LOGGER.debug("Stale register reads: %s", ", ".join(sorted(self._stale)))
+        # A slow group stays due until every read that carries it succeeded
+        failed = {
+            POLL_GROUP_IDENTIFICATION: "product" in self._stale,
+            POLL_GROUP_ENERGY: "socket_1" in self._stale or "socket_2" in self._stale,
+            POLL_GROUP_LIVE: False,
+        }
+        for group in self._due_groups:
+            if not failed[group]:
+                self._last_poll[group] = polled
+
+        duration = time.perf_counter() - started
+        self.timings.record("poll", duration)
+        self.set_timing("pollDuration", round(duration * 1000, 1))
+        self.set_timing("pollDurationP95", self.timings.percentile("poll", 95))
+        rtt = self.timings.percentile("rtt", 95)
+        if rtt is not None:
+            self.set_timing("requestRttP95", rtt)
+        return any(results)
+
+    def set_timing(self, key, value):
+        """Store a timing (ms), with a deadband relative to the last stored value."""
+        old = self.data.get(key)
+        deadband = TIMING_DEADBAND_MIN
+        if old is not None:
+            deadband = max(deadband, abs(old) * TIMING_DEADBAND_RATIO)
+        self.set_data(key, value, deadband)
+
+    async def read_modbus_data_station_unit(self):
+        """Read the blocks of the station unit."""
+        results = [
+            await self._read("product", self.read_modbus_data_product),
+            await self._read("station", self.read_modbus_data_station),
+            await self._read("scn", self.read_modbus_data_scn),
+        ]
+        return any(results)
+
+    async def read_modbus_data_station(self):
+        return await self._read_blocks(
+            self._address, [(STATION_STATUS_BLOCK, partial(self.update_data_from_block, STATION_STATUS_BLOCK))]
+        )
+
     async def read_modbus_data_scn(self):
-        if(self.has_scn):
-            status_data = await self.read_holding_registers(self._address,1400,32)
-            if status_data.isError():
-                return False
+        if not self.has_scn:
+            return True
+        if self._fleet is None:
+            block = SCN_BLOCK.select(self._wanted)
+            if block is not None:
+                return await self._read_blocks(self._address, [(block, partial(self.update_data_from_block, block))])
+            return True
+
+        # Every station of the network reports the same values, only the
+        # station elected by the fleet reads them. Each station still reads
+        # them itself with the identification, in case it changed networks.
+        scn = (self.data.get("scnName"), self.data.get("scnSockets"))
+        if scn[0] and POLL_GROUP_IDENTIFICATION not in self._due_groups:
+            values = self._fleet.scn_values(self, scn, SCN_SHARE_MAX_AGE * self._refreshInterval)
+            if values is not None:
+                for key, value, deadband in zip(SCN_BLOCK.keys(), values, SCN_BLOCK.deadbands):
+                    self.set_data(key, value, deadband)
+                return True
+        # The elected station reads the whole block for the other stations
+        result = await self._read_blocks(
+            self._address, [(SCN_BLOCK, partial(self.update_data_from_block, SCN_BLOCK))]
+        )
+        if result:
+            scn = (self.data.get("scnName"), self.data.get("scnSockets"))
+            self._fleet.publish_scn_values(self, scn, [self.data.get(key) for key in SCN_BLOCK.keys()])
+        return result
 
-            self.data["scnName"] = self.decode_from_registers(status_data.registers,0,4,self._client.DATATYPE.STRING).strip('\x00')
-            self.data["scnSockets"] =  self.decode_from_registers(status_data.registers,4,1,self._client.DATATYPE.UINT16)
-            #todo, Smart charging network registers
-        return True
-        
     async def read_modbus_data_socket(self,socket):
-        if((socket == 1) or (socket == 2 and self.has_socket_2 and self.data["numberOfSockets"] >= 2)):
-            energy_data = await self.read_holding_registers(socket,300,125)
-            if energy_data.isError():
-                return False
+        if((socket == 1) or (socket == 2 and self.has_socket_2 and self.data.get("numberOfSockets", 0) >= 2)):
+            # The status block is always read, the keepalive and the session
+            # tracking depend on it.
+            parts = [(SOCKET_STATUS_BLOCK, partial(self.update_socket_status, socket))]
+            block = SOCKET_MEASUREMENT_BLOCK.select(self._wanted, socket)
+            if block is not None:
+                parts.append((block, partial(self.update_data_from_block, block, socket=socket)))
+            if POLL_GROUP_ENERGY in self._due_groups:
+                block = SOCKET_ENERGY_BLOCK.select(self._wanted, socket)
+                if block is not None:
+                    parts.append((block, partial(self.update_data_from_block, block, socket=socket)))
+            return await self._read_blocks(socket, parts, partial(self.update_socket_derived_data, socket))
+        return True
 
+    def update_socket_derived_data(self, socket):
+        """Derive the car and session state of a socket from its decoded registers."""
+        prefix = f"socket_{socket}_"
+        mode3state = self.data[prefix + "mode3state"]
+        if mode3state in ["A","E","F"]:
+            self.set_data(prefix + "carconnected", 0)
+        else:
+            self.set_data(prefix + "carconnected", 1)
 
-     
-            self.data["socket_"+str(socket)+"_meterstate"] =  self.decode_from_registers(energy_data.registers,0,1,self._client.DATATYPE.UINT16)
-            self.data["socket_"+str(socket)+"_meterAge"] =  self.decode_from_registers(energy_data.registers,1,4,self._client.DATATYPE.UINT16)
-            self.data["socket_"+str(socket)+"_meterType"] =  self.decode_from_registers(energy_data.registers,5,1,self._client.DATATYPE.UINT16)
-            
-            self.data["socket_"+str(socket)+"_VL1-N"] =   round(self.decode_from_registers(energy_data.registers,6,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_VL2-N"] =   round(self.decode_from_registers(energy_data.registers,8,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_VL3-N"] =   round(self.decode_from_registers(energy_data.registers,10,2,self._client.DATATYPE.FLOAT32),2)
-            
-            self.data["socket_"+str(socket)+"_VL1-L2"] =  round(self.decode_from_registers(energy_data.registers,12,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_VL2-L3"] =   round(self.decode_from_registers(energy_data.registers,14,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_VL3-L1"] =   round(self.decode_from_registers(energy_data.registers,16,2,self._client.DATATYPE.FLOAT32),2)
-            
-            self.data["socket_"+str(socket)+"_currentN"] =   round(self.decode_from_registers(energy_data.registers,18,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_currentL1"] =   round(self.decode_from_registers(energy_data.registers,20,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_currentL2"] =   round(self.decode_from_registers(energy_data.registers,22,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_currentL3"] =  round(self.decode_from_registers(energy_data.registers,24,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_currentSum"] =   round(self.decode_from_registers(energy_data.registers,26,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_powerL1"] =  round(self.decode_from_registers(energy_data.registers,28,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_powerL2"] =   round(self.decode_from_registers(energy_data.registers,30,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_powerL3"] =  round(self.decode_from_registers(energy_data.registers,32,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_powerSum"] =   round(self.decode_from_registers(energy_data.registers,34,2,self._client.DATATYPE.FLOAT32),2)
-            
-            self.data["socket_"+str(socket)+"_frequency"] =   round(self.decode_from_registers(energy_data.registers,36,2,self._client.DATATYPE.FLOAT32),2)
-            
-            self.data["socket_"+str(socket)+"_realPowerL1"] =   round(self.decode_from_registers(energy_data.registers,38,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_realPowerL2"] =   round(self.decode_from_registers(energy_data.registers,40,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_realPowerL3"] =   round(self.decode_from_registers(energy_data.registers,42,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_realPowerSum"] =   round(self.decode_from_registers(energy_data.registers,44,2,self._client.DATATYPE.FLOAT32),2)    
-            self.data["socket_"+str(socket)+"_apparantPowerL1"] =   round(self.decode_from_registers(energy_data.registers,46,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_apparantPowerL2"] =   round(self.decode_from_registers(energy_data.registers,48,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_apparantPowerL3"] =  round(self.decode_from_registers(energy_data.registers,50,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_apparantPowerSum"] =  round(self.decode_from_registers(energy_data.registers,52,2,self._client.DATATYPE.FLOAT32),2)
-                    
-            self.data["socket_"+str(socket)+"_reactivePowerL1"] =   round(self.decode_from_registers(energy_data.registers,54,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_reactivePowerL2"] =   round(self.decode_from_registers(energy_data.registers,56,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_reactivePowerL3"] =   round(self.decode_from_registers(energy_data.registers,58,2,self._client.DATATYPE.FLOAT32),2)
-            self.data["socket_"+str(socket)+"_reactivePowerSum"] =   round(self.decode_from_registers(energy_data.registers,60,2,self._client.DATATYPE.FLOAT32),2)
-
-            self.data["socket_"+str(socket)+"_realEnergyDeliveredL1"] = round(self.decode_from_registers(energy_data.registers,62,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_realEnergyDeliveredL2"] =   round(self.decode_from_registers(energy_data.registers,66,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_realEnergyDeliveredL3"] =   round(self.decode_from_registers(energy_data.registers,70,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_realEnergyDeliveredSum"] =   round(self.decode_from_registers(energy_data.registers,74,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_realEnergyConsumedL1"] =  round(self.decode_from_registers(energy_data.registers,78,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_realEnergyConsumedL2"] =   round(self.decode_from_registers(energy_data.registers,82,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_realEnergyConsumedL3"] =  round(self.decode_from_registers(energy_data.registers,86,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_realEnergyConsumedSum"] =   round(self.decode_from_registers(energy_data.registers,90,4,self._client.DATATYPE.FLOAT64),2)     
-            self.data["socket_"+str(socket)+"_apparantEnergyL1"] =  round(self.decode_from_registers(energy_data.registers,92,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_apparantEnergyL2"] =   round(self.decode_from_registers(energy_data.registers,96,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_apparantEnergyL3"] =  round(self.decode_from_registers(energy_data.registers,100,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_apparantEnergySum"] =  round(self.decode_from_registers(energy_data.registers,104,4,self._client.DATATYPE.FLOAT64),2)      
-                    
-            self.data["socket_"+str(socket)+"_reactiveEnergyL1"] =   round(self.decode_from_registers(energy_data.registers,108,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_reactiveEnergyL2"] =   round(self.decode_from_registers(energy_data.registers,112,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_reactiveEnergyL3"] =  round(self.decode_from_registers(energy_data.registers,116,4,self._client.DATATYPE.FLOAT64),2) 
-            self.data["socket_"+str(socket)+"_reactiveEnergySum"] = round(self.decode_from_registers(energy_data.registers,120,4,self._client.DATATYPE.FLOAT64),2)        
-                                            
-                            
-            status_data = await self.read_holding_registers(socket,1200,16)
-            if status_data.isError():
-                return False
-  
-            self.data["socket_"+str(socket)+"_available"] =  self.decode_from_registers(status_data.registers, 0, 1,self._client.DATATYPE.UINT16) 
-            self.data["socket_"+str(socket)+"_mode3state"] =  self.decode_from_registers(status_data.registers, 1, 5, self._client.DATATYPE.STRING).strip('\x00')       
-            self.data["socket_"+str(socket)+"_actualMaxCurrent"] =   round(self.decode_from_registers(status_data.registers,6,2,self._client.DATATYPE.FLOAT32),2)   
-            self.data[VALID_TIME_S+str(socket)] = self.decode_from_registers(status_data.registers, 8, 2,self._client.DATATYPE.UINT32) 
-            self.data[MAX_CURRENT_S+str(socket)] =  round(self.decode_from_registers(status_data.registers,10,2,self._client.DATATYPE.FLOAT32),2)      
-            self.data["socket_"+str(socket)+"_saveCurrent"] =  round(self.decode_from_registers(status_data.registers,12,2,self._client.DATATYPE.FLOAT32),2)       
-            self.data["socket_"+str(socket)+"_setpointAccounted"] =  self.decode_from_registers(status_data.registers, 14, 1,self._client.DATATYPE.UINT16)    
-            self.data["socket_"+str(socket)+"_chargephases"] =  self.decode_from_registers(status_data.registers, 15, 1,self._client.DATATYPE.UINT16) 
-            
-            if self.data["socket_"+str(socket)+"_mode3state"] in ["A","E","F"]:
-                self.data["socket_"+str(socket)+"_carconnected"] = 0             
-            else:
-                self.data["socket_"+str(socket)+"_carconnected"] = 1          
-            
-            if self.data["socket_"+str(socket)+"_mode3state"] not in ["C2","D2"]:
-                self.data["socket_"+str(socket)+"_carcharging"] = 0                    
-            else:
-                if "socket_"+str(socket)+"_carcharging" not in self.data or self.data["socket_"+str(socket)+"_carcharging"] == 0:                    
-                    self.data["socket_"+str(socket)+"_chargingStartWh"] = self.data["socket_"+str(socket)+"_realEnergyDeliveredSum"]
-                    self.data["socket_"+str(socket)+"_chargingStart"] = self.data["stationTime"]
-                self.data["socket_"+str(socket)+"_carcharging"] = 1
-                
-            if "socket_"+str(socket)+"_chargingStartWh" in self.data and "socket_"+str(socket)+"_chargingStart" in self.data and self.data["socket_"+str(socket)+"_carcharging"] == 1:     
-                self.data["socket_"+str(socket)+"_currentSession"] = self.data["socket_"+str(socket)+"_realEnergyDeliveredSum"] - self.data["socket_"+str(socket)+"_chargingStartWh"]               
-                self.data["socket_"+str(socket)+"_currentSessionDuration"] = self.data["stationTime"] - self.data["socket_"+str(socket)+"_chargingStart"]
-
-            if self.data["socket_"+str(socket)+"_chargephases"] in CONTROL_PHASE_MODES:
-                self.data["usephases_S"+str(socket)] = CONTROL_PHASE_MODES[self.data["socket_"+str(socket)+"_chargephases"]]
-        return True           
-        
-        
-    async def read_modbus_data_product(self):
-        identification_data = await self.read_holding_registers(self._address, 100, 79)
-        if identification_data.isError():
+        # The station clock and the energy counters come from other reads,
+        # which may have failed so far.
+        station_time = self.data.get("stationTime")
+        energy = self.data.get(prefix + "realEnergyDeliveredSum")
+        if socket in self._restored_sessions and not self._verify_restored_session(socket, energy):
+            # The session of the last run is left alone until it was checked
+            pass
+        elif mode3state not in ["C2","D2"]:
+            if self.data.get(prefix + "carcharging") == 1:
+                self._async_record_session(socket)
+            self.set_data(prefix + "carcharging", 0)
+        elif station_time is not None and energy is not None:
+            # Anchors from before a reboot of the station belong to a session
+            # that has ended since
+            start = self.data.get(prefix + "chargingStart")
+            last_boot = self.data.get("lastBoot")
+            if (
+                self.data.get(prefix + "carcharging", 0) == 0
+                or start is None
+                or self.data.get(prefix + "chargingStartWh") is None
+                or (last_boot is not None and start < last_boot)
+            ):
+                self.data[prefix + "chargingStartWh"] = energy
+                self.data[prefix + "chargingStart"] = station_time
+                self.data[prefix + "chargingPeakCurrent"] = 0
+            self.set_data(prefix + "carcharging", 1)
+            currents = [
+                current
+                for current in (self.data.get(prefix + "current" + phase) for phase in ("L1", "L2", "L3"))
+                if current is not None and current == current
+            ]
+            if currents:
+                self.data[prefix + "chargingPeakCurrent"] = max(
+                    self.data.get(prefix + "chargingPeakCurrent", 0), *currents
+                )
+
+        start = self.data.get(prefix + "chargingStart")
+        start_energy = self.data.get(prefix + "chargingStartWh")
+        if (
+            self.data.get(prefix + "carcharging") == 1
+            and socket not in self._restored_sessions
+            and None not in (start, start_energy, station_time, energy)
+        ):
+            self.set_data(prefix + "currentSession", energy - start_energy)
+            self.set_data(prefix + "currentSessionDuration", station_time - start)
+
+        if self.data[prefix + "chargephases"] in CONTROL_PHASE_MODES:
+            self.set_data("usephases_S"+str(socket), CONTROL_PHASE_MODES[self.data[prefix + "chargephases"]])
+
+    def _verify_restored_session(self, socket, energy):
+        """Check the session anchors restored from the last run against the station.
+
+        Returns false while the clock has not been read in this run, the
+        anchors are not used until then. A session that started before the
+        last boot of the station, or whose energy counter went back, has
+        ended while Home Assistant was down and its anchors are dropped.
+        """
+        if self.last_update("product") is None:
             return False
+        self._restored_sessions.discard(socket)
+        prefix = f"socket_{socket}_"
+        start = self.data.get(prefix + "chargingStart")
+        start_energy = self.data.get(prefix + "chargingStartWh")
+        last_boot = self.data.get("lastBoot")
+        if (
+            start is None
+            or start_energy is None
+            or (last_boot is not None and start < last_boot)
+            or (energy is not None and energy < start_energy)
+        ):
+            _LOGGER.debug("Dropped the restored session of socket %s, it ended while stopped", socket)
+            for key in ("chargingStart", "chargingStartWh", "chargingPeakCurrent"):
+                self.data.pop(prefix + key, None)
+            self.set_data(prefix + "carcharging", 0)
+        return True
 
-        self.data["name"] = self.decode_from_registers(identification_data.registers, 0, 17, self._client.DATATYPE.STRING).strip('\x00')
-        self.data["manufacturer"] = self.decode_from_registers(identification_data.registers, 17, 5, self._client.DATATYPE.STRING).strip('\x00')
-        self.data["modbustableVersion"] = self.decode_from_registers(identification_data.registers, 22, 1,self._client.DATATYPE.INT16)
-        self.data["firmwareVersion"] = self.decode_from_registers(identification_data.registers, 23, 17, self._client.DATATYPE.STRING).strip('\x00')
-        self.data["platformType"] = self.decode_from_registers(identification_data.registers, 40, 17, self._client.DATATYPE.STRING).strip('\x00')
-        self.data["serial"] = self.decode_from_registers(identification_data.registers, 57, 11, self._client.DATATYPE.STRING).strip('\x00')
-
-        year    = self.decode_from_registers(identification_data.registers, 68, 1,self._client.DATATYPE.INT16)
-        month   = self.decode_from_registers(identification_data.registers, 69, 1,self._client.DATATYPE.INT16)
-        day     = self.decode_from_registers(identification_data.registers, 70, 1,self._client.DATATYPE.INT16)
-        hour    = self.decode_from_registers(identification_data.registers, 71, 1,self._client.DATATYPE.INT16)
-        minute  = self.decode_from_registers(identification_data.registers, 72, 1,self._client.DATATYPE.INT16)
-        second  = self.decode_from_registers(identification_data.registers, 73, 1,self._client.DATATYPE.INT16)
-        uptime  = self.decode_from_registers(identification_data.registers, 74, 4,self._client.DATATYPE.UINT64)
-        utcoffset = self.decode_from_registers(identification_data.registers, 78, 1,self._client.DATATYPE.INT16)
+    @callback
+    def _async_record_session(self, socket):
+        """Append the session that just ended on the socket to the ledger."""
+        prefix = f"socket_{socket}_"
+        start = self.data.get(prefix + "chargingStart")
+        start_energy = self.data.get(prefix + "chargingStartWh")
+        stop = self.data.get("stationTime")
+        energy = self.data.get(prefix + "realEnergyDeliveredSum")
+        if self.ledger is None or None in (start, start_energy, stop, energy):
+            return
+        self._hass.async_add_executor_job(
+            self.ledger.add,
+            self._name,
+            socket,
+            start.timestamp(),
+            stop.timestamp(),
+            energy - start_energy,
+            self.data.get(prefix + "chargingPeakCurrent"),
+            self.data.get(prefix + "chargephases"),
+        )
+
+    async def read_modbus_data_product(self):
+        """Read the station clock, together with the identification when it is due."""
+        parts = [(STATION_CLOCK_BLOCK, self.update_station_time)]
+        if POLL_GROUP_IDENTIFICATION in self._due_groups:
+            block = PRODUCT_IDENTIFICATION_BLOCK.select(self._wanted)
+            if block is not None:
+                parts.append((block, partial(self.update_data_from_block, block)))
+        return await self._read_blocks(self._address, parts)
+
+    def update_station_time(self, raw, read_start):
+        """Decode the station clock registers into stationTime and lastBoot."""
+        year, month, day, hour, minute, second, uptime, utcoffset = STATION_CLOCK_BLOCK.values(raw, read_start)
 
         # Tijdconversie
-        self.data["stationTime"] = datetime(
+        station_time = datetime(
             year, month, day, hour, minute, second,
             tzinfo=tzoffset("", utcoffset * 60)
         )
+        self.set_data("stationTime", station_time)
 
-        last_boot = self.data["stationTime"] - timedelta(milliseconds=uptime)
-        self.data["lastBoot"] = last_boot.replace(microsecond=0)
-
-        return True
+        last_boot = station_time - timedelta(milliseconds=uptime)
+        self.set_data("lastBoot", last_boot.replace(microsecond=0))
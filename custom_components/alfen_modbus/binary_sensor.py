@@ -1,24 +1,16 @@
 """Binary sensor platform for Alfen Modbus."""
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional
 
-from homeassistant.components.binary_sensor import (
-    BinarySensorEntity,
-    BinarySensorDeviceClass,
-)
+from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.const import CONF_NAME
-from homeassistant.core import callback
 
 from .const import DOMAIN, ATTR_MANUFACTURER
+from .descriptions import BINARY_SENSOR_DESCRIPTIONS
 from .entity import AlfenEntity
 
 _LOGGER = logging.getLogger(__name__)
 
-BINARY_SENSOR_TYPES = [
-    ["Car Connected", "carconnected", BinarySensorDeviceClass.PLUG, "mdi:power-plug", "mdi:power-plug-off"],
-    ["Car Charging", "carcharging", BinarySensorDeviceClass.BATTERY_CHARGING, "mdi:battery-charging", "mdi:battery-off"],
-]
-
 
 async def async_setup_entry(hass, entry, async_add_entities) -> None:
     """Set up Alfen binary sensors."""
@@ -34,37 +26,9 @@ async def async_setup_entry(hass, entry, async_add_entities) -> None:
     }
 
     entities = []
-
-    # Socket 1 binary sensors
-    for sensor_info in BINARY_SENSOR_TYPES:
-        sensor = AlfenBinarySensor(
-            hub_name,
-            hub,
-            device_info,
-            1,
-            sensor_info[0],
-            sensor_info[1],
-            sensor_info[2],
-            sensor_info[3],
-            sensor_info[4],
-        )
-        entities.append(sensor)
-
-    # Socket 2 binary sensors (if available)
-    if hub.has_socket_2:
-        for sensor_info in BINARY_SENSOR_TYPES:
-            sensor = AlfenBinarySensor(
-                hub_name,
-                hub,
-                device_info,
-                2,
-                sensor_info[0],
-                sensor_info[1],
-                sensor_info[2],
-                sensor_info[3],
-                sensor_info[4],
-            )
-            entities.append(sensor)
+    for socket in (1, 2) if hub.has_socket_2 else (1,):
+        for description in BINARY_SENSOR_DESCRIPTIONS[socket]:
+            entities.append(AlfenBinarySensor(hub_name, hub, device_info, socket, description))
 
     async_add_entities(entities)
     return True
@@ -73,27 +37,13 @@ async def async_setup_entry(hass, entry, async_add_entities) -> None:
 class AlfenBinarySensor(AlfenEntity, BinarySensorEntity):
     """Representation of an Alfen Modbus binary sensor."""
 
-    def __init__(
-        self,
-        platform_name,
-        hub,
-        device_info,
-        socket,
-        name,
-        key,
-        device_class,
-        icon_on,
-        icon_off,
-    ) -> None:
+    def __init__(self, platform_name, hub, device_info, socket, description) -> None:
         """Initialize the binary sensor."""
         super().__init__(hub, device_info)
         self._platform_name = platform_name
-        self._socket = socket
-        self._name = f"S{socket} {name}" if hub.has_socket_2 else name
-        self._key = f"socket_{socket}_{key}"
-        self._attr_device_class = device_class
-        self._icon_on = icon_on
-        self._icon_off = icon_off
+        self._description = description
+        self._name = f"S{socket} {description.name}" if hub.has_socket_2 else description.name
+        self._key = description.key
 
     @property
     def name(self) -> str:
@@ -105,6 +55,11 @@ class AlfenBinarySensor(AlfenEntity, BinarySensorEntity):
         """Return unique ID."""
         return f"{self._platform_name}_{self._key}"
 
+    @property
+    def device_class(self):
+        """Return the device class."""
+        return self._description.device_class
+
     @property
     def is_on(self) -> bool:
         """Return true if the binary sensor is on."""
@@ -115,4 +70,4 @@ class AlfenBinarySensor(AlfenEntity, BinarySensorEntity):
     @property
     def icon(self) -> str:
         """Return the icon based on state."""
-        return self._icon_on if self.is_on else self._icon_off
+        return self._description.icon_on if self.is_on else self._description.icon_off
@@ -3,7 +3,7 @@ import logging
 import re
 
 import voluptuous as vol
-from pymodbus.client import ModbusTcpClient
+from pymodbus.client import AsyncModbusTcpClient
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_NAME, CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL
@@ -16,8 +16,10 @@ from .const import (
     CONF_MODBUS_ADDRESS,
     CONF_READ_SCN,
     CONF_READ_SOCKET2,
+    CONF_MAX_IN_FLIGHT,
     DEFAULT_READ_SCN,
     DEFAULT_READ_SOCKET2,
+    DEFAULT_MAX_IN_FLIGHT,
 )
 from homeassistant.core import HomeAssistant, callback
 
@@ -32,6 +34,9 @@ DATA_SCHEMA = vol.Schema(
         vol.Optional(CONF_READ_SCN, default=DEFAULT_READ_SCN): bool,
         vol.Optional(CONF_READ_SOCKET2, default=DEFAULT_READ_SOCKET2): bool,
         vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
+        vol.Optional(CONF_MAX_IN_FLIGHT, default=DEFAULT_MAX_IN_FLIGHT): vol.All(
+            int, vol.Range(min=1, max=4)
+        ),
     }
 )
 
@@ -49,13 +54,10 @@ def host_valid(host):
 async def async_test_connection(hass: HomeAssistant, host: str, port: int) -> bool:
     """Test if we can connect to the Modbus device."""
     try:
-        client = ModbusTcpClient(host=host, port=port)
-        # Run connection test in executor to avoid blocking
-        result = await hass.async_add_executor_job(client.connect)
-        if result:
-            await hass.async_add_executor_job(client.close)
-            return True
-        return False
+        client = AsyncModbusTcpClient(host=host, port=port, reconnect_delay=0)
+        result = await client.connect()
+        client.close()
+        return result
     except Exception as e:
         _LOGGER.debug("Connection test failed: %s", e)
         return False
@@ -168,6 +170,12 @@ class AlfenModbusOptionsFlowHandler(config_entries.OptionsFlow):
                         CONF_READ_SOCKET2, DEFAULT_READ_SOCKET2
                     ),
                 ): bool,
+                vol.Optional(
+                    CONF_MAX_IN_FLIGHT,
+                    default=self.config_entry.data.get(
+                        CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT
+                    ),
+                ): vol.All(int, vol.Range(min=1, max=4)),
             }
         )
 
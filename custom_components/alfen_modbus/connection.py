@@ -0,0 +1,198 @@
+"""Modbus TCP connection handling for the Alfen Modbus integration."""
+import asyncio
+import contextlib
+import logging
+import random
+import time
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusException, ModbusIOException
+
+from .const import (
+    DOMAIN,
+    RECONNECT_BACKOFF_MIN,
+    RECONNECT_BACKOFF_MAX,
+    CIRCUIT_OPEN_FAILURES,
+)
+from .timing import PhaseTimings
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CONNECTED = "connected"
+STATE_BACKING_OFF = "backing_off"
+STATE_OPEN = "open"
+
+
+class ConnectionUnavailable(ConnectionException):
+    """Raised without touching the network while the station is unreachable."""
+
+
+class ModbusConnection:
+    """A pool of modbus TCP connections to one station, with a circuit breaker.
+
+    While connected, requests connect lazily and retry once after a
+    reconnect, also when the station did not answer in time. When that fails
+    too the connection starts backing off: requests fail fast with
+    ConnectionUnavailable and a background probe reconnects with exponential
+    backoff and jitter. After CIRCUIT_OPEN_FAILURES failures without an
+    answered request the circuit is open and the station is probed at the
+    maximum backoff. A station that accepts connections but does not answer
+    gets there as well, each failed round after a reconnect counts.
+    """
+
+    def __init__(self, hass, host, port, size=1, request_slots=None, timings=None):
+        """Initialize the connection, size is the number of TCP connections."""
+        self._hass = hass
+        self._host = host
+        self._port = port
+        # pymodbus keeps one transaction in flight per connection, so up to
+        # size connections are opened for concurrent requests.
+        # reconnect_delay=0 disables the background reconnect loop of pymodbus,
+        # reconnecting is driven by this class.
+        self._clients = [
+            AsyncModbusTcpClient(host=host, port=port, reconnect_delay=0)
+            for _ in range(max(1, size))
+        ]
+        self._idle_clients = asyncio.Queue()
+        for client in self._clients:
+            self._idle_clients.put_nowait(client)
+        self._request_slots = request_slots if request_slots is not None else contextlib.nullcontext()
+        self._timings = timings if timings is not None else PhaseTimings()
+        self.state = STATE_CONNECTED
+        self._failures = 0
+        self._probe = None
+
+    @property
+    def client(self):
+        """Return the first client, for the payload conversion helpers."""
+        return self._clients[0]
+
+    async def connect(self):
+        """Connect the first client, start probing when that fails."""
+        try:
+            connected = await self._clients[0].connect()
+        except OSError as e:
+            _LOGGER.debug("Connecting to %s:%s failed: %s", self._host, self._port, e)
+            connected = False
+        if not connected:
+            self._async_failed("connect failed")
+        return connected
+
+    def close(self):
+        """Disconnect all clients and stop probing, later requests connect again."""
+        if self._probe is not None:
+            self._probe.cancel()
+            self._probe = None
+        for client in self._clients:
+            client.close()
+        self.state = STATE_CONNECTED
+        self._failures = 0
+
+    async def execute(self, request, **kwargs):
+        """Run a client request, reconnecting and retrying once on connection loss."""
+        if self.state != STATE_CONNECTED:
+            raise ConnectionUnavailable(f"{self._host}:{self._port} is unreachable ({self.state})")
+        queued = time.perf_counter()
+        client = await self._idle_clients.get()
+        try:
+            method = getattr(client, request)
+            self._timings.record("connection_wait", time.perf_counter() - queued)
+            try:
+                await self._ensure_connected(client)
+                return await self._send(method, kwargs)
+            except (ConnectionException, ModbusIOException, OSError) as e:
+                # ModbusIOException is a timeout or a lost response
+                _LOGGER.warning("Connection error during %s, attempting reconnect: %s", request, e)
+            if self.state != STATE_CONNECTED:
+                # Another request gave up on the station meanwhile
+                raise ConnectionUnavailable(f"{self._host}:{self._port} is unreachable ({self.state})")
+            # Try to reconnect once
+            try:
+                client.close()
+                await self._ensure_connected(client)
+                return await self._send(method, kwargs)
+            except (ModbusException, OSError) as retry_error:
+                _LOGGER.error("Failed to reconnect and retry %s: %s", request, retry_error)
+                self._async_failed(retry_error)
+                raise
+        finally:
+            self._idle_clients.put_nowait(client)
+
+    async def _send(self, method, kwargs):
+        """Send a request on a connected client.
+
+        The fleet request slot is only held while the request is in flight,
+        connecting and reconnecting to a station that is down does not keep
+        the other stations waiting.
+        """
+        waiting = time.perf_counter()
+        async with self._request_slots:
+            started = time.perf_counter()
+            self._timings.record("fleet_wait", started - waiting)
+            result = await method(**kwargs)
+        self._failures = 0
+        rtt = time.perf_counter() - started
+        self._timings.record("rtt", rtt)
+        self._timings.record(f"rtt {kwargs.get('device_id')}:{kwargs.get('address')}", rtt)
+        return result
+
+    async def _ensure_connected(self, client):
+        """Connect the client if it is not connected."""
+        if client.connected:
+            return
+        _LOGGER.debug("Modbus connection lost, reconnecting...")
+        client.close()
+        if not await client.connect():
+            raise ConnectionException("Failed to reconnect to modbus device")
+
+    def _async_failed(self, error):
+        """Stop sending requests and reconnect in the background."""
+        if self.state != STATE_CONNECTED:
+            return
+        _LOGGER.warning(
+            "Lost connection to %s:%s, reconnecting in the background: %s",
+            self._host, self._port, error,
+        )
+        self._failures += 1
+        self.state = STATE_BACKING_OFF
+        self._check_open()
+        for client in self._clients:
+            client.close()
+        self._probe = self._hass.async_create_background_task(
+            self._async_probe(), f"{DOMAIN} reconnect {self._host}:{self._port}"
+        )
+
+    async def _async_probe(self):
+        """Reconnect with exponential backoff and jitter until the station answers."""
+        client = self._clients[0]
+        try:
+            while True:
+                if self.state == STATE_OPEN:
+                    delay = RECONNECT_BACKOFF_MAX
+                else:
+                    delay = min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_MIN * 2 ** self._failures)
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+                client.close()
+                try:
+                    connected = await client.connect()
+                except OSError:
+                    connected = False
+                if connected:
+                    # The failures are only forgotten once a request is answered
+                    _LOGGER.info("Reconnected to %s:%s", self._host, self._port)
+                    self.state = STATE_CONNECTED
+                    return
+                self._failures += 1
+                self._check_open()
+        finally:
+            if self._probe is asyncio.current_task():
+                self._probe = None
+
+    def _check_open(self):
+        """Open the circuit after too many failures."""
+        if self._failures >= CIRCUIT_OPEN_FAILURES and self.state != STATE_OPEN:
+            _LOGGER.warning(
+                "%s:%s is not responding, probing every %s seconds",
+                self._host, self._port, RECONNECT_BACKOFF_MAX,
+            )
+            self.state = STATE_OPEN
@@ -5,160 +5,248 @@ DEFAULT_PORT = 502
 DEFAULT_MODBUS_ADDRESS = 200
 DEFAULT_READ_SCN = False
 DEFAULT_READ_SOCKET2 = False
+DEFAULT_MAX_IN_FLIGHT = 1
 CONF_ALFENHUB_HUB = "alfen_hub"
 ATTR_STATUS_DESCRIPTION = "status_description"
 ATTR_MANUFACTURER = "Alfen"
 CONF_MODBUS_ADDRESS = "modbus_address"
 CONF_READ_SCN = "read_scn"
 CONF_READ_SOCKET2 = "read_socket_2"
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+# Identification of the station cached in the config entry, the platforms
+# are set up from it before the station answered.
+CONF_DEVICE_INFO = "device_info"
+DEVICE_INFO_KEYS = ("platformType", "firmwareVersion", "numberOfSockets")
+
+# Register groups polled at their own cadence (seconds), the live group
+# follows the configured scan interval.
+POLL_GROUP_IDENTIFICATION = "identification"
+POLL_GROUP_ENERGY = "energy"
+POLL_GROUP_LIVE = "live"
+IDENTIFICATION_SCAN_INTERVAL = 4 * 3600
+ENERGY_SCAN_INTERVAL = 60
+
+# All hubs in one Home Assistant instance are scheduled by a fleet, which
+# spreads their polls over the scan interval and caps the modbus requests in
+# flight over all chargers.
+DATA_FLEET = f"{DOMAIN}_fleet"
+FLEET_MAX_CONCURRENT_REQUESTS = 8
+FLEET_JITTER = 0.1  # fraction of the scan interval
+# After a (re)start the hubs connect and do their first poll in the
+# background, this many at a time.
+FLEET_MAX_CONCURRENT_STARTS = 4
+SITE_NAME = "alfen_site"
+# The stations of a smart charging network (SCN) report the same network
+# registers, one elected station reads them for the others. Its values are
+# shared for this many scan intervals of the reading hub.
+SCN_SHARE_MAX_AGE = 2
+
+# Reconnect backoff (seconds) once a station stops answering, after
+# CIRCUIT_OPEN_FAILURES failed attempts it is only probed at the maximum.
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 300
+CIRCUIT_OPEN_FAILURES = 5
+
+# The hub data, including the session anchors, is saved to a store per
+# config entry at most once per save delay (seconds) and restored on setup.
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60
+
+# Finished charging sessions of all stations are appended to a SQLite
+# ledger in the config directory, the query_sessions service reads it.
+DATA_LEDGER = f"{DOMAIN}_ledger"
+LEDGER_FILE = f"{DOMAIN}_sessions.db"
+SERVICE_QUERY_SESSIONS = "query_sessions"
+
+# Writes to the same register within this window (seconds) are coalesced
+WRITE_DEBOUNCE = 0.5
+
+# The max current setpoint is rewritten this many seconds before its valid
+# time (register 1208) runs out, but not more often than the minimum interval.
+KEEPALIVE_MARGIN = 10
+KEEPALIVE_MIN_INTERVAL = 5
+# A rewrite that does not extend the valid time is retried at a doubling
+# interval, up to the scan interval. After this many the retries stop and
+# only the polls trigger a rewrite.
+KEEPALIVE_MAX_RETRIES = 5
+
+# Poll phase timings keep this many samples per phase, the histograms in the
+# diagnostics count them in buckets below these edges (ms).
+TIMING_SAMPLES = 256
+TIMING_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+# The timing sensors only change by this fraction of their value, and at
+# least by the minimum (ms), so jitter does not publish every poll.
+TIMING_DEADBAND_RATIO = 0.1
+TIMING_DEADBAND_MIN = 5
 
 VALID_TIME_S = "maxCurrentValidTime_socket_"
 MAX_CURRENT_S = "maxCurrent_socket_"
 
-SENSOR_TYPES = {
-    "Name": ["Name","name" , None, None],
-    "Manufacturer": ["Manufacturer","manufacturer" , None, None],
-    "Modbus_table_version": ["Modbus table version","modbustableVersion" , None, None],
-    "Firmware_version": ["Firmware version","firmwareVersion" , None, None],
-    "Platform_type": ["Platform Type","platformType" , None, None],
-    "Serial": ["Serial","serial" , None, None],
-    "Current_time": ["Current time","stationTime" , None, None],
-    "Last_boot": ["Last boot","lastBoot" , None, None],
-    
-    "Actual_max_current": ["Actual max current","actualMaxCurrent" , "A", "mdi:current-dc"],
-    "Board_temp": ["Board temperature","boardTemperature" ,  "°C", None],
-    "Backoffice_connected": ["Backoffice connected","backofficeConnected" , None, None],
-    "Number_of_sockets": ["Number of sockets","numberOfSockets" , None, None],    
-}
+# Register maps, one row per field:
+# [offset, struct format, key, scale, digits, deadband, sensor id, sensor name, unit, icon]
+# The offset is relative to the first register of the block and the struct
+# format is big-endian (a register is "H", a float32 "f", a float64 "d").
+# A change smaller than the deadband is not published to the entities.
+# Socket keys contain "{}" which is replaced by the socket number. Rows with a
+# sensor id of None are decoded but not exposed as a sensor, rows with an
+# offset of None are sensors derived by the hub.
 
+PRODUCT_IDENTIFICATION_REGISTERS = [
+    [0, "34s", "name", None, None, None, "Name", "Name", None, None],
+    [17, "10s", "manufacturer", None, None, None, "Manufacturer", "Manufacturer", None, None],
+    [22, "h", "modbustableVersion", None, None, None, "Modbus_table_version", "Modbus table version", None, None],
+    [23, "34s", "firmwareVersion", None, None, None, "Firmware_version", "Firmware version", None, None],
+    [40, "34s", "platformType", None, None, None, "Platform_type", "Platform Type", None, None],
+    [57, "22s", "serial", None, None, None, "Serial", "Serial", None, None],
+]
 
-SOCKET1_SENSOR_TYPES = {
-  "S1_Meterstate": ["S1 Meter state","socket_1_meterstate" , None, None],
-  "S1_Meterage": ["S1 Meter reading age","socket_1_meterAge" ,  "s", None],
-  "S1_Metertype": ["S1 Meter Type","socket_1_meterType" , None, None],
-  "S1_VoltageL1N": ["S1 Voltage L1-N","socket_1_VL1-N" , "V", None],
-  "S1_VoltageL2N": ["S1 Voltage L2-N","socket_1_VL2-N" , "V", None],
-  "S1_VoltageL3N": ["S1 Voltage L3-N","socket_1_VL3-N" , "V", None],
-  "S1_VoltageL1L2": ["S1 Voltage L1-L2","socket_1_VL1-L2" , "V", None],
-  "S1_VoltageL2L3": ["S1 Voltage L2-L3","socket_1_VL2-L3" , "V", None],
-  "S1_VoltageL3L1": ["S1 Voltage L3-L1","socket_1_VL3-L1" , "V", None],
-  "S1_CurrN": ["S1 Current N","socket_1_currentN" , "A",  "mdi:current-ac"],
-  "S1_CurrL1": ["S1 Current L1","socket_1_currentL1" , "A",  "mdi:current-ac"],
-  "S1_CurrL2": ["S1 Current L2","socket_1_currentL2" , "A",  "mdi:current-ac"],
-  "S1_CurrL3": ["S1 Current L3","socket_1_currentL3" , "A",  "mdi:current-ac"],
-  "S1_CurrTotal": ["S1 Current Total","socket_1_currentSum" , "A",  "mdi:current-ac"],
-  "S1_PowerFactorL1": ["S1 Power factor L1","socket_1_powerL1" , None, None],
-  "S1_PowerFactorL2": ["S1 Power factor L2","socket_1_powerL2" , None, None],
-  "S1_PowerFactorL3": ["S1 Power factor L3","socket_1_powerL3" , None, None],
-  "S1_PowerFactorSum": ["S1 Power factor sum","socket_1_powerSum" ,  None, None],
-  "S1_Frequency": ["S1 Frequency","socket_1_frequency" , "Hz", None],
-  "S1_RealPowerL1": ["S1 Real power L1","socket_1_realPowerL1" , "W", None],
-  "S1_RealPowerL2": ["S1 Real power L2","socket_1_realPowerL2" , "W", None],
-  "S1_RealPowerL3": ["S1 Real power L3","socket_1_realPowerL3" , "W", None],
-  "S1_RealPowerSum": ["S1 Real power sum","socket_1_realPowerSum" , "W",None],
-  "S1_Apparant_Power_PhaseL1": ["S1 Apparant power L1","socket_1_apparantPowerL1" , "VA",  None],
-  "S1_Apparant_Power_PhaseL2": ["S1 Apparant power L2","socket_1_apparantPowerL2" , "VA",  None],
-  "S1_Apparant_Power_PhaseL3": ["S1 Apparant power L3","socket_1_apparantPowerL3" , "VA",  None],
-  "S1_Apparant_Power_Sum": ["S1 Apparant power sum","socket_1_apparantPowerSum" , "VA", None],
-  "S1_Reactive_Power_Phase_L1": ["S1 Reactive power L1","socket_1_reactivePowerL1" , "VAr", None],
-  "S1_Reactive_Power_Phase_L2": ["S1 Reactive power L2","socket_1_reactivePowerL2" , "VAr", None],
-  "S1_Reactive_Power_Phase_L3": ["S1 Reactive power L3","socket_1_reactivePowerL3" , "VAr", None],
-  "S1_Reactive_Power_Sum": ["S1 Reactive power sum","socket_1_reactivePowerSum" , "VAr",None],
-  "S1_Real_Enegery_Delivered_Phase_L1": ["S1 Real energy delivered L1","socket_1_realEnergyDeliveredL1" , "Wh",None],
-  "S1_Real_Enegery_Delivered_Phase_L2": ["S1 Real energy delivered L2","socket_1_realEnergyDeliveredL2" , "Wh",None],
-  "S1_Real_Enegery_Delivered_Phase_L3": ["S1 Real energy delivered L3","socket_1_realEnergyDeliveredL3" , "Wh",None],
-  "S1_Real_Enegery_Delivered_Sum": ["S1 Real energy delivered sum","socket_1_realEnergyDeliveredSum" , "Wh",None],
-  "S1_Real_Energy_Cosumed_Phase_L1": ["S1 Real energy consumed L1","socket_1_realEnergyConsumedL1" , "Wh", None],
-  "S1_Real_Energy_Cosumed_Phase_L2": ["S1 Real energy consumed L2","socket_1_realEnergyConsumedL2" , "Wh", None],
-  "S1_Real_Energy_Cosumed_Phase_L3": ["S1 Real energy consumed L3","socket_1_realEnergyConsumedL3" , "Wh", None],
-  "S1_Real_Energy_Cosumed_Sum": ["S1 Real energy consumed sum","socket_1_realEnergyConsumedSum" , "Wh",None],
-  "S1_Apparant_Energy_Phase_L1": ["S1 Apparant energy L1","socket_1_apparantEnergyL1" , "VAh",    None],
-  "S1_Apparant_Energy_Phase_L2": ["S1 Apparant energy L2","socket_1_apparantEnergyL2" , "VAh",    None],
-  "S1_Apparant_Energy_Phase_L3": ["S1 Apparant energy L3","socket_1_apparantEnergyL3" , "VAh",    None],
-  "S1_Apparant_Energy_Sum": ["S1 Apparant energy sum","socket_1_apparantEnergySum" , "VAh",   None],
-  "S1_Reactieve_Energy_Phase_L1": ["S1 Reactive energy L1","socket_1_reactiveEnergyL1" , "VAh",    None],
-  "S1_Reactieve_Energy_Phase_L2": ["S1 Reactive energy L2","socket_1_reactiveEnergyL2" , "VAh",    None],
-  "S1_Reactieve_Energy_Phase_L3": ["S1 Reactive energy L3","socket_1_reactiveEnergyL3" , "VAh",    None],
-  "S1_Reactieve_Energy_Sum": ["S1 Reactive energy sum","socket_1_reactiveEnergySum" , "VAh",   None],
-  "S1_Availability": ["S1 Availability","socket_1_available" ,  None, None],
-  "S1_Mode3State": ["S1 Mode 3 State","socket_1_mode3state" ,  None, None],
-  "S1_Actual_Applied_Max_Current": ["S1 Actual applied max current","socket_1_actualMaxCurrent" , "A",  "mdi:current-ac"],
-  "S1_Modbus_Slave_Max_Current_Valid_Time": ["S1 Max current valid time",VALID_TIME_S+str(1) ,  "s", None],
-  "S1_Modbus_Slave_Max_Current": ["S1 Max current",MAX_CURRENT_S+str(1) , "A",  "mdi:current-ac"],
-  "S1_Active_Load_Balacing_Save_Current": ["S1 Active load balacing safe current","socket_1_saveCurrent" , "A",  "mdi:current-ac"],
-  "S1_Slave_Setpoint_Accounted": ["S1 Received SP accounted for","socket_1_setpointAccounted" ,  None, None],
-  "S1_Charging_Mode_Phases": ["S1 Charging Mode","socket_1_chargephases" , None, None],  
-  "S1_Car_Charging": ["S1 Car charging","socket_1_carcharging" , None, None],  
-  "S1_Car_Connected": ["S1 Car connected","socket_1_carconnected" , None, None],  
-  "S1_CurrentSession": ["S1 Current session Wh", "socket_1_currentSession", "Wh", None],
-  "S1_CurrentSessionDuration": ["S1 Current session duration", "socket_1_currentSessionDuration", "s", None],
-}
+STATION_CLOCK_REGISTERS = [
+    [0, "h", "year", None, None, None, None, None, None, None],
+    [1, "h", "month", None, None, None, None, None, None, None],
+    [2, "h", "day", None, None, None, None, None, None, None],
+    [3, "h", "hour", None, None, None, None, None, None, None],
+    [4, "h", "minute", None, None, None, None, None, None, None],
+    [5, "h", "second", None, None, None, None, None, None, None],
+    [6, "Q", "uptime", None, None, None, None, None, None, None],
+    [10, "h", "utcoffset", None, None, None, None, None, None, None],
+    [None, None, "stationTime", None, None, None, "Current_time", "Current time", None, None],
+    [None, None, "lastBoot", None, None, None, "Last_boot", "Last boot", None, None],
+]
+
+STATION_STATUS_REGISTERS = [
+    [0, "f", "actualMaxCurrent", None, 2, None, "Actual_max_current", "Actual max current", "A", "mdi:current-dc"],
+    [2, "f", "boardTemperature", None, 2, 0.1, "Board_temp", "Board temperature", "°C", None],
+    [4, "H", "backofficeConnected", None, None, None, "Backoffice_connected", "Backoffice connected", None, None],
+    [5, "H", "numberOfSockets", None, None, None, "Number_of_sockets", "Number of sockets", None, None],
+]
+
+SCN_REGISTERS = [
+    [0, "8s", "scnName", None, None, None, "SCN_Name", "SCN Name", None, None],
+    [4, "H", "scnSockets", None, None, None, "Number_of_scn_sockets", "Number of SCN sockets", None, None],
+    [5, "f", "scnCurrentL1", None, 2, None, "SCN_CurrL1", "SCN Current L1", "A", "mdi:current-ac"],
+    [7, "f", "scnCurrentL2", None, 2, None, "SCN_CurrL2", "SCN Current L2", "A", "mdi:current-ac"],
+    [9, "f", "scnCurrentL3", None, 2, None, "SCN_CurrL3", "SCN Current L3", "A", "mdi:current-ac"],
+    [11, "f", "scnActualMaxCurrentL1", None, 2, None, "SCN_Actual_Max_CurrL1", "SCN Actual max current L1", "A", "mdi:current-ac"],
+    [13, "f", "scnActualMaxCurrentL2", None, 2, None, "SCN_Actual_Max_CurrL2", "SCN Actual max current L2", "A", "mdi:current-ac"],
+    [15, "f", "scnActualMaxCurrentL3", None, 2, None, "SCN_Actual_Max_CurrL3", "SCN Actual max current L3", "A", "mdi:current-ac"],
+    [17, "f", "scnMaxCurrentL1", None, 2, None, "SCN_Max_CurrL1", "SCN Max current L1", "A", "mdi:current-ac"],
+    [19, "f", "scnMaxCurrentL2", None, 2, None, "SCN_Max_CurrL2", "SCN Max current L2", "A", "mdi:current-ac"],
+    [21, "f", "scnMaxCurrentL3", None, 2, None, "SCN_Max_CurrL3", "SCN Max current L3", "A", "mdi:current-ac"],
+    [23, "I", "scnMaxCurrentValidTimeL1", None, None, None, "SCN_Max_Current_Valid_TimeL1", "SCN Max current valid time L1", "s", None],
+    [25, "I", "scnMaxCurrentValidTimeL2", None, None, None, "SCN_Max_Current_Valid_TimeL2", "SCN Max current valid time L2", "s", None],
+    [27, "I", "scnMaxCurrentValidTimeL3", None, None, None, "SCN_Max_Current_Valid_TimeL3", "SCN Max current valid time L3", "s", None],
+    [29, "f", "scnSafeCurrent", None, 2, None, "SCN_Safe_Current", "SCN Safe current", "A", "mdi:current-ac"],
+    [31, "H", "scnMaxCurrentEnabled", None, None, None, "SCN_Max_Current_Enabled", "SCN Modbus slave max current", None, None],
+]
 
-SOCKET2_SENSOR_TYPES = {
-  "S2_Meterstate": ["S2 Meter state","socket_2_meterstate" , None, None],
-  "S2_Meterage": ["S2 Meter reading age","socket_2_meterAge" ,  "s", None],
-  "S2_Metertype": ["S2 Meter Type","socket_2_meterType" , None, None],
-  "S2_VoltageL1N": ["S2 Voltage L1-N","socket_2_VL1-N" , "V", None],
-  "S2_VoltageL2N": ["S2 Voltage L2-N","socket_2_VL2-N" , "V", None],
-  "S2_VoltageL3N": ["S2 Voltage L3-N","socket_2_VL3-N" , "V", None],
-  "S2_VoltageL1L2": ["S2 Voltage L1-L2","socket_2_VL1-L2" , "V", None],
-  "S2_VoltageL2L3": ["S2 Voltage L2-L3","socket_2_VL2-L3" , "V", None],
-  "S2_VoltageL3L1": ["S2 Voltage L3-L1","socket_2_VL3-L1" , "V", None],
-  "S2_CurrN": ["S2 Current N","socket_2_currentN" , "A",  "mdi:current-ac"],
-  "S2_CurrL1": ["S2 Current L1","socket_2_currentL1" , "A",  "mdi:current-ac"],
-  "S2_CurrL2": ["S2 Current L2","socket_2_currentL2" , "A",  "mdi:current-ac"],
-  "S2_CurrL3": ["S2 Current L3","socket_2_currentL3" , "A",  "mdi:current-ac"],
-  "S2_CurrTotal": ["S2 Current Total","socket_2_currentSum" , "A",  "mdi:current-ac"],
-  "S2_PowerFactorL1": ["S2 Power factor L1","socket_2_powerL1" , None, None],
-  "S2_PowerFactorL2": ["S2 Power factor L2","socket_2_powerL2" , None, None],
-  "S2_PowerFactorL3": ["S2 Power factor L3","socket_2_powerL3" , None, None],
-  "S2_PowerFactorSum": ["S2 Power factor sum","socket_2_powerSum" ,  None, None],
-  "S2_Frequency": ["S2 Frequency","socket_2_frequency" , "Hz", None],
-  "S2_RealPowerL1": ["S2 Real power L1","socket_2_realPowerL1" , "W", None],
-  "S2_RealPowerL2": ["S2 Real power L2","socket_2_realPowerL2" , "W", None],
-  "S2_RealPowerL3": ["S2 Real power L3","socket_2_realPowerL3" , "W", None],
-  "S2_RealPowerSum": ["S2 Real power sum","socket_2_realPowerSum" , "W",None],
-  "S2_Apparant_Power_PhaseL1": ["S2 Apparant power L1","socket_2_apparantPowerL1" , "VA",  None],
-  "S2_Apparant_Power_PhaseL2": ["S2 Apparant power L2","socket_2_apparantPowerL2" , "VA",  None],
-  "S2_Apparant_Power_PhaseL3": ["S2 Apparant power L3","socket_2_apparantPowerL3" , "VA",  None],
-  "S2_Apparant_Power_Sum": ["S2 Apparant power sum","socket_2_apparantPowerSum" , "VA", None],
-  "S2_Reactive_Power_Phase_L1": ["S2 Reactive power L1","socket_2_reactivePowerL1" , "VAr", None],
-  "S2_Reactive_Power_Phase_L2": ["S2 Reactive power L2","socket_2_reactivePowerL2" , "VAr", None],
-  "S2_Reactive_Power_Phase_L3": ["S2 Reactive power L3","socket_2_reactivePowerL3" , "VAr", None],
-  "S2_Reactive_Power_Sum": ["S2 Reactive power sum","socket_2_reactivePowerSum" , "VAr",None],
-  "S2_Real_Enegery_Delivered_Phase_L1": ["S2 Real energy delivered L1","socket_2_realEnergyDeliveredL1" , "Wh",None],
-  "S2_Real_Enegery_Delivered_Phase_L2": ["S2 Real energy delivered L2","socket_2_realEnergyDeliveredL2" , "Wh",None],
-  "S2_Real_Enegery_Delivered_Phase_L3": ["S2 Real energy delivered L3","socket_2_realEnergyDeliveredL3" , "Wh",None],
-  "S2_Real_Enegery_Delivered_Sum": ["S2 Real energy delivered sum","socket_2_realEnergyDeliveredSum" , "Wh",None],
-  "S2_Real_Energy_Cosumed_Phase_L1": ["S2 Real energy consumed L1","socket_2_realEnergyConsumedL1" , "Wh", None],
-  "S2_Real_Energy_Cosumed_Phase_L2": ["S2 Real energy consumed L2","socket_2_realEnergyConsumedL2" , "Wh", None],
-  "S2_Real_Energy_Cosumed_Phase_L3": ["S2 Real energy consumed L3","socket_2_realEnergyConsumedL3" , "Wh", None],
-  "S2_Real_Energy_Cosumed_Sum": ["S2 Real energy consumed sum","socket_2_realEnergyConsumedSum" , "Wh",None],
-  "S2_Apparant_Energy_Phase_L1": ["S2 Apparant energy L1","socket_2_apparantEnergyL1" , "VAh",    None],
-  "S2_Apparant_Energy_Phase_L2": ["S2 Apparant energy L2","socket_2_apparantEnergyL2" , "VAh",    None],
-  "S2_Apparant_Energy_Phase_L3": ["S2 Apparant energy L3","socket_2_apparantEnergyL3" , "VAh",    None],
-  "S2_Apparant_Energy_Sum": ["S2 Apparant energy sum","socket_2_apparantEnergySum" , "VAh",   None],
-  "S2_Reactieve_Energy_Phase_L1": ["S2 Reactive energy L1","socket_2_reactiveEnergyL1" , "VAh",    None],
-  "S2_Reactieve_Energy_Phase_L2": ["S2 Reactive energy L2","socket_2_reactiveEnergyL2" , "VAh",    None],
-  "S2_Reactieve_Energy_Phase_L3": ["S2 Reactive energy L3","socket_2_reactiveEnergyL3" , "VAh",    None],
-  "S2_Reactieve_Energy_Sum": ["S2 Reactive energy sum","socket_2_reactiveEnergySum" , "VAh",   None],
-  "S2_Availability": ["S2 Availability","socket_2_available" ,  None, None],
-  "S2_Mode3State": ["S2 Mode 3 State","socket_2_mode3state" ,  None, None],
-  "S2_Actual_Applied_Max_Current": ["S2 Actual applied max current","socket_2_actualMaxCurrent" , "A",  "mdi:current-ac"],
-  "S2_Modbus_Slave_Max_Current_Valid_Time": ["S2 Max current valid time",VALID_TIME_S+str(2) ,  "s", None],
-  "S2_Modbus_Slave_Max_Current": ["S2 Max current",MAX_CURRENT_S+str(2) , "A",  "mdi:current-ac"],
-  "S2_Active_Load_Balacing_Save_Current": ["S2 Active load balacing safe current","socket_2_saveCurrent" , "A",  "mdi:current-ac"],
-  "S2_Slave_Setpoint_Accounted": ["S2 Received SP accounted for","socket_2_setpointAccounted" ,  None, None],
-  "S2_Charging_Mode_Phases": ["S2 Charging Mode","socket_2_chargephases" , None, None],  
-  "S2_Car_Charging": ["S2 Car charging","socket_2_carcharging" , None, None],  
-  "S2_Car_Connected": ["S2 Car connected","socket_2_carconnected" , None, None],    
-  "S2_CurrentSession": ["S2 Current session Wh", "socket_2_currentSession", "Wh", None],
-  "S2_CurrentSessionDuration": ["S2 Current session duration", "socket_2_currentSessionDuration", "s", None],
+SOCKET_MEASUREMENT_REGISTERS = [
+    [0, "H", "socket_{}_meterstate", None, None, None, "Meterstate", "Meter state", None, None],
+    [1, "Q", "socket_{}_meterAge", 0.001, 1, None, "Meterage", "Meter reading age", "s", None],
+    [5, "H", "socket_{}_meterType", None, None, None, "Metertype", "Meter Type", None, None],
+    [6, "f", "socket_{}_VL1-N", None, 2, 0.1, "VoltageL1N", "Voltage L1-N", "V", None],
+    [8, "f", "socket_{}_VL2-N", None, 2, 0.1, "VoltageL2N", "Voltage L2-N", "V", None],
+    [10, "f", "socket_{}_VL3-N", None, 2, 0.1, "VoltageL3N", "Voltage L3-N", "V", None],
+    [12, "f", "socket_{}_VL1-L2", None, 2, 0.1, "VoltageL1L2", "Voltage L1-L2", "V", None],
+    [14, "f", "socket_{}_VL2-L3", None, 2, 0.1, "VoltageL2L3", "Voltage L2-L3", "V", None],
+    [16, "f", "socket_{}_VL3-L1", None, 2, 0.1, "VoltageL3L1", "Voltage L3-L1", "V", None],
+    [18, "f", "socket_{}_currentN", None, 2, None, "CurrN", "Current N", "A", "mdi:current-ac"],
+    [20, "f", "socket_{}_currentL1", None, 2, None, "CurrL1", "Current L1", "A", "mdi:current-ac"],
+    [22, "f", "socket_{}_currentL2", None, 2, None, "CurrL2", "Current L2", "A", "mdi:current-ac"],
+    [24, "f", "socket_{}_currentL3", None, 2, None, "CurrL3", "Current L3", "A", "mdi:current-ac"],
+    [26, "f", "socket_{}_currentSum", None, 2, None, "CurrTotal", "Current Total", "A", "mdi:current-ac"],
+    [28, "f", "socket_{}_powerL1", None, 2, None, "PowerFactorL1", "Power factor L1", None, None],
+    [30, "f", "socket_{}_powerL2", None, 2, None, "PowerFactorL2", "Power factor L2", None, None],
+    [32, "f", "socket_{}_powerL3", None, 2, None, "PowerFactorL3", "Power factor L3", None, None],
+    [34, "f", "socket_{}_powerSum", None, 2, None, "PowerFactorSum", "Power factor sum", None, None],
+    [36, "f", "socket_{}_frequency", None, 2, None, "Frequency", "Frequency", "Hz", None],
+    [38, "f", "socket_{}_realPowerL1", None, 2, 1, "RealPowerL1", "Real power L1", "W", None],
+    [40, "f", "socket_{}_realPowerL2", None, 2, 1, "RealPowerL2", "Real power L2", "W", None],
+    [42, "f", "socket_{}_realPowerL3", None, 2, 1, "RealPowerL3", "Real power L3", "W", None],
+    [44, "f", "socket_{}_realPowerSum", None, 2, 1, "RealPowerSum", "Real power sum", "W", None],
+    [46, "f", "socket_{}_apparantPowerL1", None, 2, 1, "Apparant_Power_PhaseL1", "Apparant power L1", "VA", None],
+    [48, "f", "socket_{}_apparantPowerL2", None, 2, 1, "Apparant_Power_PhaseL2", "Apparant power L2", "VA", None],
+    [50, "f", "socket_{}_apparantPowerL3", None, 2, 1, "Apparant_Power_PhaseL3", "Apparant power L3", "VA", None],
+    [52, "f", "socket_{}_apparantPowerSum", None, 2, 1, "Apparant_Power_Sum", "Apparant power sum", "VA", None],
+    [54, "f", "socket_{}_reactivePowerL1", None, 2, 1, "Reactive_Power_Phase_L1", "Reactive power L1", "VAr", None],
+    [56, "f", "socket_{}_reactivePowerL2", None, 2, 1, "Reactive_Power_Phase_L2", "Reactive power L2", "VAr", None],
+    [58, "f", "socket_{}_reactivePowerL3", None, 2, 1, "Reactive_Power_Phase_L3", "Reactive power L3", "VAr", None],
+    [60, "f", "socket_{}_reactivePowerSum", None, 2, 1, "Reactive_Power_Sum", "Reactive power sum", "VAr", None],
+]
+
+# Real energy consumed sum (offset 28) overlaps apparent energy L1 (offset 30)
+# in the table as implemented, the decoder handles overlapping fields.
+SOCKET_ENERGY_REGISTERS = [
+    [0, "d", "socket_{}_realEnergyDeliveredL1", None, 2, None, "Real_Enegery_Delivered_Phase_L1", "Real energy delivered L1", "Wh", None],
+    [4, "d", "socket_{}_realEnergyDeliveredL2", None, 2, None, "Real_Enegery_Delivered_Phase_L2", "Real energy delivered L2", "Wh", None],
+    [8, "d", "socket_{}_realEnergyDeliveredL3", None, 2, None, "Real_Enegery_Delivered_Phase_L3", "Real energy delivered L3", "Wh", None],
+    [12, "d", "socket_{}_realEnergyDeliveredSum", None, 2, None, "Real_Enegery_Delivered_Sum", "Real energy delivered sum", "Wh", None],
+    [16, "d", "socket_{}_realEnergyConsumedL1", None, 2, None, "Real_Energy_Cosumed_Phase_L1", "Real energy consumed L1", "Wh", None],
+    [20, "d", "socket_{}_realEnergyConsumedL2", None, 2, None, "Real_Energy_Cosumed_Phase_L2", "Real energy consumed L2", "Wh", None],
+    [24, "d", "socket_{}_realEnergyConsumedL3", None, 2, None, "Real_Energy_Cosumed_Phase_L3", "Real energy consumed L3", "Wh", None],
+    [28, "d", "socket_{}_realEnergyConsumedSum", None, 2, None, "Real_Energy_Cosumed_Sum", "Real energy consumed sum", "Wh", None],
+    [30, "d", "socket_{}_apparantEnergyL1", None, 2, None, "Apparant_Energy_Phase_L1", "Apparant energy L1", "VAh", None],
+    [34, "d", "socket_{}_apparantEnergyL2", None, 2, None, "Apparant_Energy_Phase_L2", "Apparant energy L2", "VAh", None],
+    [38, "d", "socket_{}_apparantEnergyL3", None, 2, None, "Apparant_Energy_Phase_L3", "Apparant energy L3", "VAh", None],
+    [42, "d", "socket_{}_apparantEnergySum", None, 2, None, "Apparant_Energy_Sum", "Apparant energy sum", "VAh", None],
+    [46, "d", "socket_{}_reactiveEnergyL1", None, 2, None, "Reactieve_Energy_Phase_L1", "Reactive energy L1", "VAh", None],
+    [50, "d", "socket_{}_reactiveEnergyL2", None, 2, None, "Reactieve_Energy_Phase_L2", "Reactive energy L2", "VAh", None],
+    [54, "d", "socket_{}_reactiveEnergyL3", None, 2, None, "Reactieve_Energy_Phase_L3", "Reactive energy L3", "VAh", None],
+    [58, "d", "socket_{}_reactiveEnergySum", None, 2, None, "Reactieve_Energy_Sum", "Reactive energy sum", "VAh", None],
+]
+
+SOCKET_STATUS_REGISTERS = [
+    [0, "H", "socket_{}_available", None, None, None, "Availability", "Availability", None, None],
+    [1, "10s", "socket_{}_mode3state", None, None, None, "Mode3State", "Mode 3 State", None, None],
+    [6, "f", "socket_{}_actualMaxCurrent", None, 2, None, "Actual_Applied_Max_Current", "Actual applied max current", "A", "mdi:current-ac"],
+    [8, "I", VALID_TIME_S + "{}", None, None, None, "Modbus_Slave_Max_Current_Valid_Time", "Max current valid time", "s", None],
+    [10, "f", MAX_CURRENT_S + "{}", None, 2, None, "Modbus_Slave_Max_Current", "Max current", "A", "mdi:current-ac"],
+    [12, "f", "socket_{}_saveCurrent", None, 2, None, "Active_Load_Balacing_Save_Current", "Active load balacing safe current", "A", "mdi:current-ac"],
+    [14, "H", "socket_{}_setpointAccounted", None, None, None, "Slave_Setpoint_Accounted", "Received SP accounted for", None, None],
+    [15, "H", "socket_{}_chargephases", None, None, None, "Charging_Mode_Phases", "Charging Mode", None, None],
+]
+
+SOCKET_DERIVED_SENSORS = [
+    [None, None, "socket_{}_carcharging", None, None, None, "Car_Charging", "Car charging", None, None],
+    [None, None, "socket_{}_carconnected", None, None, None, "Car_Connected", "Car connected", None, None],
+    [None, None, "socket_{}_currentSession", None, None, None, "CurrentSession", "Current session Wh", "Wh", None],
+    [None, None, "socket_{}_currentSessionDuration", None, None, None, "CurrentSessionDuration", "Current session duration", "s", None],
+    [None, None, "socket_{}_keepaliveMargin", None, None, None, "Max_Current_Keepalive_Margin", "Max current keepalive margin", "s", None],
+    [None, None, "socket_{}_keepaliveMarginMin", None, None, None, "Max_Current_Keepalive_Margin_Min", "Max current keepalive margin min", "s", None],
+]
+
+# Timings of the hub itself, see timing.py
+POLL_TIMING_SENSORS = [
+    [None, None, "pollDuration", None, None, None, "Poll_Duration", "Poll duration", "ms", "mdi:timer-outline"],
+    [None, None, "pollDurationP95", None, None, None, "Poll_Duration_P95", "Poll duration p95", "ms", "mdi:timer-outline"],
+    [None, None, "requestRttP95", None, None, None, "Request_RTT_P95", "Modbus round trip p95", "ms", "mdi:timer-outline"],
+]
+
+DIAGNOSTIC_KEYS = {row[2] for row in POLL_TIMING_SENSORS}
+
+SOCKET_REGISTERS = (
+    SOCKET_MEASUREMENT_REGISTERS
+    + SOCKET_ENERGY_REGISTERS
+    + SOCKET_STATUS_REGISTERS
+    + SOCKET_DERIVED_SENSORS
+)
+
+# Site sensors sum a socket value over all chargers of the fleet
+SITE_SOCKET_KEYS = {
+    "site_currentL1": "currentL1",
+    "site_currentL2": "currentL2",
+    "site_currentL3": "currentL3",
+    "site_currentSum": "currentSum",
+    "site_realPowerSum": "realPowerSum",
+    "site_carcharging": "carcharging",
 }
 
-SCN_SENSOR_TYPES = {
-  "SCN_Name": ["SCN Name","scnName" , None, None],
-  "Number_of_scn_sockets": ["Number of SCN sockets","scnSockets" , None, None],
+SITE_SENSOR_TYPES = {
+    "Site_CurrL1": ["Current L1", "site_currentL1", "A", "mdi:current-ac"],
+    "Site_CurrL2": ["Current L2", "site_currentL2", "A", "mdi:current-ac"],
+    "Site_CurrL3": ["Current L3", "site_currentL3", "A", "mdi:current-ac"],
+    "Site_CurrTotal": ["Current Total", "site_currentSum", "A", "mdi:current-ac"],
+    "Site_RealPowerSum": ["Real power sum", "site_realPowerSum", "W", None],
+    "Site_Charging": ["Sockets charging", "site_carcharging", None, "mdi:ev-station"],
 }
 
 
@@ -217,3 +305,21 @@ CONTROL_PHASE = [
 CONTROL_SLAVE_MAX_CURRENT = [
     ["Max Current Limit S", MAX_CURRENT_S, 1210, "f", {"min": 0, "max": 32, "unit": "A", "mode": "slider", "step": 0.1}]
 ]
+
+BINARY_SENSOR_TYPES = [
+    ["Car Connected", "carconnected", "plug", "mdi:power-plug", "mdi:power-plug-off"],
+    ["Car Charging", "carcharging", "battery_charging", "mdi:battery-charging", "mdi:battery-off"],
+]
+
+# Sensor states that are shown through a mapping, by register map key
+STATE_MAPS = {
+    "socket_{}_meterType": METER_TYPE,
+    "socket_{}_meterstate": METER_STATE_MODES,
+    "socket_{}_available": AVAILABILITY_MODES,
+    "backofficeConnected": BOOLEAN_EXPLAINED,
+    "socket_{}_setpointAccounted": BOOLEAN_EXPLAINED,
+    "socket_{}_carconnected": BOOLEAN_EXPLAINED,
+    "socket_{}_carcharging": BOOLEAN_EXPLAINED,
+    "socket_{}_chargephases": CONTROL_PHASE_MODES,
+    "scnMaxCurrentEnabled": SCN_MAX_CURRENT_ENABLED,
+}
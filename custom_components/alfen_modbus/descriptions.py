@@ -0,0 +1,197 @@
+"""Entity descriptions, built once from the register maps in const.py.
+
+A description is shared by every entity of its key. It carries what the
+entity needs to render its state, including a formatter bound when the
+description is built, so reading a state is a single call.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfEnergy, UnitOfPower
+
+from .const import (
+    PRODUCT_IDENTIFICATION_REGISTERS,
+    STATION_CLOCK_REGISTERS,
+    STATION_STATUS_REGISTERS,
+    POLL_TIMING_SENSORS,
+    SCN_REGISTERS,
+    SOCKET_REGISTERS,
+    SITE_SENSOR_TYPES,
+    BINARY_SENSOR_TYPES,
+    CONTROL_PHASE,
+    CONTROL_SLAVE_MAX_CURRENT,
+    DIAGNOSTIC_KEYS,
+    STATE_MAPS,
+)
+
+
+def passthrough(value):
+    """Return the value as it is."""
+    return value
+
+
+def enum_formatter(mapping):
+    """Return a formatter that maps the known values and passes others through."""
+    get = mapping.get
+
+    def format_value(value):
+        return get(value, value)
+
+    return format_value
+
+
+_FORMATTERS = {key: enum_formatter(mapping) for key, mapping in STATE_MAPS.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class SensorDescription:
+    """Describes an Alfen sensor."""
+
+    key: str
+    name: str
+    unit: Optional[str] = None
+    icon: Optional[str] = None
+    device_class: Optional[SensorDeviceClass] = None
+    state_class: Optional[SensorStateClass] = SensorStateClass.MEASUREMENT
+    entity_category: Optional[EntityCategory] = None
+    formatter: Callable[[Any], Any] = passthrough
+
+
+@dataclass(frozen=True, slots=True)
+class BinarySensorDescription:
+    """Describes an Alfen binary sensor of a socket."""
+
+    key: str
+    name: str
+    device_class: BinarySensorDeviceClass
+    icon_on: str
+    icon_off: str
+
+
+@dataclass(frozen=True, slots=True)
+class NumberDescription:
+    """Describes an Alfen number of a socket."""
+
+    key: str
+    name: str
+    register: int
+    fmt: str
+    min_value: float
+    max_value: float
+    unit: Optional[str] = None
+    mode: Optional[str] = None
+    step: Optional[float] = None
+
+
+@dataclass(frozen=True, slots=True)
+class SelectDescription:
+    """Describes an Alfen select of a socket."""
+
+    key: str
+    name: str
+    register: int
+    options: Tuple[str, ...]
+    option_values: Dict[str, int]
+
+
+def _sensor_description(key, name, unit, icon, formatter=passthrough):
+    state_class = SensorStateClass.MEASUREMENT
+    device_class = None
+    if unit in (UnitOfEnergy.KILO_WATT_HOUR, UnitOfEnergy.WATT_HOUR):
+        state_class = SensorStateClass.TOTAL_INCREASING
+        device_class = SensorDeviceClass.ENERGY
+    elif unit == UnitOfPower.WATT:
+        device_class = SensorDeviceClass.POWER
+    return SensorDescription(
+        key=key,
+        name=name,
+        unit=unit,
+        icon=icon,
+        device_class=device_class,
+        state_class=state_class,
+        entity_category=EntityCategory.DIAGNOSTIC if key in DIAGNOSTIC_KEYS else None,
+        formatter=formatter,
+    )
+
+
+def sensor_descriptions(register_map, socket=None):
+    """Build the descriptions of the register map rows that expose a sensor."""
+    descriptions = {}
+    for row in register_map:
+        key, sensor_id, name, unit, icon = row[2], row[6], row[7], row[8], row[9]
+        if sensor_id is None:
+            continue
+        formatter = _FORMATTERS.get(key, passthrough)
+        if socket is not None:
+            sensor_id = f"S{socket}_{sensor_id}"
+            name = f"S{socket} {name}"
+            key = key.format(socket)
+        descriptions[sensor_id] = _sensor_description(key, name, unit, icon, formatter)
+    return tuple(descriptions.values())
+
+
+SENSOR_DESCRIPTIONS = sensor_descriptions(
+    PRODUCT_IDENTIFICATION_REGISTERS
+    + STATION_CLOCK_REGISTERS
+    + STATION_STATUS_REGISTERS
+    + POLL_TIMING_SENSORS
+)
+
+SCN_SENSOR_DESCRIPTIONS = sensor_descriptions(SCN_REGISTERS)
+
+SOCKET_SENSOR_DESCRIPTIONS = {
+    socket: sensor_descriptions(SOCKET_REGISTERS, socket) for socket in (1, 2)
+}
+
+SITE_SENSOR_DESCRIPTIONS = tuple(
+    _sensor_description(key, name, unit, icon)
+    for name, key, unit, icon in SITE_SENSOR_TYPES.values()
+)
+
+BINARY_SENSOR_DESCRIPTIONS = {
+    socket: tuple(
+        BinarySensorDescription(
+            key=f"socket_{socket}_{key}",
+            name=name,
+            device_class=BinarySensorDeviceClass(device_class),
+            icon_on=icon_on,
+            icon_off=icon_off,
+        )
+        for name, key, device_class, icon_on, icon_off in BINARY_SENSOR_TYPES
+    )
+    for socket in (1, 2)
+}
+
+NUMBER_DESCRIPTIONS = {
+    socket: tuple(
+        NumberDescription(
+            key=key + str(socket),
+            name=name + str(socket),
+            register=register,
+            fmt=fmt,
+            min_value=attrs["min"],
+            max_value=attrs["max"],
+            unit=attrs.get("unit"),
+            mode=attrs.get("mode"),
+            step=attrs.get("step"),
+        )
+        for name, key, register, fmt, attrs in CONTROL_SLAVE_MAX_CURRENT
+    )
+    for socket in (1, 2)
+}
+
+SELECT_DESCRIPTIONS = {
+    socket: tuple(
+        SelectDescription(
+            key=key + str(socket),
+            name=name + str(socket),
+            register=register,
+            options=tuple(options.values()),
+            option_values={option: value for value, option in options.items()},
+        )
+        for name, key, register, options in CONTROL_PHASE
+    )
+    for socket in (1, 2)
+}
@@ -0,0 +1,20 @@
+"""Diagnostics support for the Alfen Modbus integration."""
+from typing import Any, Dict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    hub = hass.data[DOMAIN][entry.data[CONF_NAME]]["hub"]
+    return {
+        "connection_state": hub.connection_state,
+        "block_stats": hub.block_stats,
+        "timings": hub.timings.summary(),
+    }
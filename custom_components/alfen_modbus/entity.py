@@ -2,7 +2,7 @@
 
 from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.helpers.entity import Entity, EntityDescription
+from homeassistant.helpers.entity import Entity
 
 from . import AlfenModbusHub
 
@@ -12,6 +12,7 @@ class AlfenEntity(Entity):
 
     # _attr_has_entity_name = True
     _attr_should_poll = False
+    _key = None
 
     def __init__(
         self,
@@ -24,13 +25,16 @@ class AlfenEntity(Entity):
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
-        self._hub.async_add_alfen_sensor(self._modbus_data_updated)
+        self.async_on_remove(
+            self._hub.async_subscribe(self._key, self._modbus_data_updated)
+        )
 
-    async def async_will_remove_from_hass(self) -> None:
-        """Remove callbacks."""
-        self._hub.async_remove_alfen_sensor(self._modbus_data_updated)
+    @property
+    def available(self) -> bool:
+        """Return False while the last read of this entity's registers failed."""
+        return not self._hub.is_stale(self._key)
 
     @callback
     def _modbus_data_updated(self) -> None:
-        """Handle updated data from the hub."""
+        """Handle a change of this entity's key in the hub data."""
         self.async_write_ha_state()
@@ -0,0 +1,101 @@
+"""Ledger of the charging sessions of all stations, kept in SQLite."""
+import logging
+import sqlite3
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+# Times are unix timestamps, energy in Wh and the peak current in A
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    station TEXT NOT NULL,
+    socket INTEGER NOT NULL,
+    start REAL NOT NULL,
+    stop REAL NOT NULL,
+    energy REAL NOT NULL,
+    peak_current REAL,
+    phases INTEGER
+);
+CREATE INDEX IF NOT EXISTS sessions_socket ON sessions (station, socket, start);
+CREATE INDEX IF NOT EXISTS sessions_start ON sessions (start);
+"""
+
+COLUMNS = ("station", "socket", "start", "stop", "energy", "peak_current", "phases")
+
+
+class SessionLedger:
+    """Append-only ledger of the finished charging sessions.
+
+    The methods block on the database, run them in the executor. The
+    database is opened on first use.
+    """
+
+    def __init__(self, path):
+        """Initialize the ledger."""
+        self._path = path
+        self._db = None
+        # Executor jobs run on any of its threads
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self._path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def add(self, station, socket, start, stop, energy, peak_current=None, phases=None):
+        """Append a session, returns false when it could not be written."""
+        try:
+            with self._lock:
+                db = self._connect()
+                with db:
+                    db.execute(
+                        f"INSERT INTO sessions ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (station, socket, start, stop, energy, peak_current, phases),
+                    )
+        except sqlite3.Error as e:
+            _LOGGER.error("Recording the session of %s socket %s failed: %s", station, socket, e)
+            return False
+        return True
+
+    def _where(self, start, end, station, socket):
+        clauses = ["start >= ?", "start < ?"]
+        args = [start, end]
+        if station is not None:
+            clauses.append("station = ?")
+            args.append(station)
+        if socket is not None:
+            clauses.append("socket = ?")
+            args.append(socket)
+        return " AND ".join(clauses), args
+
+    def query(self, start, end, station=None, socket=None):
+        """Return the sessions that started in [start, end), oldest first."""
+        where, args = self._where(start, end, station, socket)
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {', '.join(COLUMNS)} FROM sessions WHERE {where} ORDER BY start", args
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def aggregate(self, start, end, station=None, socket=None):
+        """Return the number, energy and duration of the sessions per station and socket."""
+        where, args = self._where(start, end, station, socket)
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT station, socket, COUNT(*), SUM(energy), SUM(stop - start), MAX(peak_current)"
+                f" FROM sessions WHERE {where} GROUP BY station, socket ORDER BY station, socket",
+                args,
+            ).fetchall()
+        return [
+            dict(zip(("station", "socket", "sessions", "energy", "duration", "peak_current"), row))
+            for row in rows
+        ]
+
+    def close(self):
+        """Close the database, a later call opens it again."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,17 +1,15 @@
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional
 
 from .const import (
     DOMAIN,
     ATTR_MANUFACTURER,
-    CONTROL_SLAVE_MAX_CURRENT,
 )
+from .descriptions import NUMBER_DESCRIPTIONS
 
 from homeassistant.const import CONF_NAME
 from homeassistant.components.number import NumberEntity
 
-from homeassistant.core import callback
-
 from .entity import AlfenEntity
 
 _LOGGER = logging.getLogger(__name__)
@@ -29,76 +27,41 @@ async def async_setup_entry(hass, entry, async_add_entities) -> None:
     }
 
     entities = []
-
-    for number_info in CONTROL_SLAVE_MAX_CURRENT:
-        number = AlfenNumber(
-            hub_name,
-            hub,
-            device_info,
-            1,
-            number_info[0],
-            number_info[1],
-            number_info[2],
-            number_info[3],
-            number_info[4],
-        )
-        entities.append(number)
-        
-    if hub.has_socket_2:
-        for number_info in CONTROL_SLAVE_MAX_CURRENT:
-            number = AlfenNumber(
-                hub_name,
-                hub,
-                device_info,
-                2,
-                number_info[0],
-                number_info[1],
-                number_info[2],
-                number_info[3],
-                number_info[4],
-            )
-            entities.append(number)
+    for socket in (1, 2) if hub.has_socket_2 else (1,):
+        for description in NUMBER_DESCRIPTIONS[socket]:
+            entities.append(AlfenNumber(hub_name, hub, device_info, socket, description))
 
     async_add_entities(entities)
     return True
 
-class AlfenNumber(NumberEntity):
+class AlfenNumber(AlfenEntity, NumberEntity):
     """Representation of an Alfen Modbus number."""
 
-    def __init__(self,
-                 platform_name,
-                 hub,
-                 device_info,
-                 socket,
-                 name,
-                 key,
-                 register,
-                 fmt,
-                 attrs
-    ) -> None:
+    def __init__(self, platform_name, hub, device_info, socket, description) -> None:
         """Initialize the number."""
         super().__init__(hub, device_info)
         self._platform_name = platform_name
-        self._name = name+str(socket)
+        self._description = description
+        self._name = description.name
         self._socket = socket
-        self._key = key+str(socket)
-        self._register = register
-        self._fmt = fmt
-        self._attr_native_min_value = attrs["min"]
-        self._attr_native_max_value = attrs["max"]
-        if "unit" in attrs.keys():
-            self._attr_native_unit_of_measurement = attrs["unit"]
-        if "mode" in attrs.keys():
-            self._attr_mode = attrs["mode"]
-        if "step" in attrs.keys():
-            self._attr_native_step = attrs["step"]
+        self._key = description.key
+        self._register = description.register
+        self._fmt = description.fmt
+        self._attr_native_min_value = description.min_value
+        self._attr_native_max_value = description.max_value
+        if description.unit is not None:
+            self._attr_native_unit_of_measurement = description.unit
+        if description.mode is not None:
+            self._attr_mode = description.mode
+        if description.step is not None:
+            self._attr_native_step = description.step
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
-        self._hub.async_add_alfen_sensor(self._modbus_data_updated, self.update_value)
+        self._hub.async_add_alfen_sensor(self._modbus_data_updated, self.update_value, key=self._key, socket=self._socket)
 
     async def async_will_remove_from_hass(self) -> None:
-        self._hub.async_remove_alfen_sensor(self._modbus_data_updated, self.update_value)
+        self._hub.async_remove_alfen_sensor(self._modbus_data_updated, self.update_value, key=self._key)
 
     @property
     def name(self) -> str:
@@ -114,7 +77,11 @@ class AlfenNumber(NumberEntity):
         if self._key in self._hub.data:
             return self._hub.data[self._key]
 
-    async def update_value(self):
+    async def update_value(self, force=True):
+        """Write the setpoint, by default even when it did not change.
+
+        Rewriting the max current keeps the station's valid time running.
+        """
         if self._key not in self._hub.data:
             _LOGGER.debug("Key %s not in hub data, skipping update_value", self._key)
             return
@@ -134,7 +101,7 @@ class AlfenNumber(NumberEntity):
         elif self._fmt == "f":
             payload = self._hub._client.convert_to_registers(float(value), data_type=self._hub._client.DATATYPE.FLOAT32, word_order="big")
 
-        await self._hub.write_registers(unit=self._socket, address=self._register, payload=payload)
+        self._hub.async_queue_write(self._socket, self._register, payload, force)
 
 
     async def async_set_native_value(self, value: float) -> None:
@@ -147,6 +114,5 @@ class AlfenNumber(NumberEntity):
                 value = max_allowed
 
         self._hub.data[self._key] = value
-        await self.update_value()       
-        self.hass.async_create_task(self._hub.async_refresh_modbus_data())
+        await self.update_value(force=False)
         self.async_write_ha_state()
@@ -0,0 +1,171 @@
+"""Table driven decoding of Alfen Modbus register blocks."""
+import struct
+
+from .const import (
+    PRODUCT_IDENTIFICATION_REGISTERS,
+    STATION_CLOCK_REGISTERS,
+    STATION_STATUS_REGISTERS,
+    SCN_REGISTERS,
+    SOCKET_MEASUREMENT_REGISTERS,
+    SOCKET_ENERGY_REGISTERS,
+    SOCKET_STATUS_REGISTERS,
+)
+
+# A read request returns at most 125 registers. Reading up to READ_GAP unused
+# registers between two blocks is cheaper than another round trip.
+MAX_READ_COUNT = 125
+READ_GAP = 32
+
+_REGISTER_STRUCTS = {}
+
+
+def registers_to_bytes(registers):
+    """Pack a list of 16-bit registers into big-endian bytes."""
+    count = len(registers)
+    packer = _REGISTER_STRUCTS.get(count)
+    if packer is None:
+        packer = _REGISTER_STRUCTS[count] = struct.Struct(f">{count}H")
+    return packer.pack(*registers)
+
+
+class RegisterBlock:
+    """A contiguous range of holding registers described by a register map.
+
+    The map is compiled once into struct layouts, so a block is decoded with a
+    single unpack_from per layout over the raw register bytes. Fields that
+    overlap an earlier field are moved to an extra layout.
+    """
+
+    __slots__ = ("start", "count", "deadbands", "_layouts", "_rows", "_keys", "_socket_keys", "_numeric", "_strings", "_subsets")
+
+    def __init__(self, start, register_map, count=None):
+        """Compile the register map, count defaults to the extent of the map."""
+        self.start = start
+        layouts = []
+        keys = []
+        deadbands = []
+        for row in sorted((row for row in register_map if row[0] is not None), key=lambda row: row[0]):
+            offset, fmt = row[0], row[1]
+            for layout in layouts:
+                if layout[0] <= offset:
+                    break
+            else:
+                layout = [0, ">", []]
+                layouts.append(layout)
+            if offset > layout[0]:
+                layout[1] += f"{(offset - layout[0]) * 2}x"
+            layout[1] += fmt
+            layout[0] = offset + struct.calcsize(">" + fmt) // 2
+            layout[2].append(row)
+
+        numeric = []
+        strings = []
+        rows = []
+        for layout in layouts:
+            for row in layout[2]:
+                index = len(keys)
+                rows.append(row)
+                keys.append(row[2])
+                deadbands.append(row[5])
+                if row[1].endswith("s"):
+                    strings.append(index)
+                elif row[3] is not None or row[4] is not None:
+                    numeric.append((index, row[3], row[4]))
+
+        self.count = count or max(layout[0] for layout in layouts)
+        self._layouts = tuple(struct.Struct(layout[1]) for layout in layouts)
+        self._rows = tuple(rows)
+        self._keys = tuple(keys)
+        self.deadbands = tuple(deadbands)
+        self._socket_keys = {}
+        self._numeric = tuple(numeric)
+        self._strings = tuple(strings)
+        self._subsets = {}
+
+    def keys(self, socket=None):
+        """Return the data keys of the fields, in decode order."""
+        if socket is None:
+            return self._keys
+        keys = self._socket_keys.get(socket)
+        if keys is None:
+            keys = self._socket_keys[socket] = tuple(key.format(socket) for key in self._keys)
+        return keys
+
+    def select(self, wanted, socket=None):
+        """Return the block reduced to the fields whose key is in wanted.
+
+        Returns the block itself when wanted is None or covers every field,
+        and None when no field is wanted.
+        """
+        if wanted is None:
+            return self
+        indices = tuple(index for index, key in enumerate(self.keys(socket)) if key in wanted)
+        if len(indices) == len(self._keys):
+            return self
+        if not indices:
+            return None
+        subset = self._subsets.get(indices)
+        if subset is None:
+            rows = [self._rows[index] for index in indices]
+            first = min(row[0] for row in rows)
+            subset = self._subsets[indices] = RegisterBlock(
+                self.start + first, [[row[0] - first, *row[1:]] for row in rows]
+            )
+        return subset
+
+    def values(self, raw, read_start=None):
+        """Decode the fields from raw register bytes, in decode order.
+
+        read_start is the first register contained in raw, when the block was
+        read as part of a larger range.
+        """
+        offset = 0 if read_start is None else (self.start - read_start) * 2
+        if len(self._layouts) == 1:
+            values = list(self._layouts[0].unpack_from(raw, offset))
+        else:
+            values = []
+            for layout in self._layouts:
+                values.extend(layout.unpack_from(raw, offset))
+        for index, scale, digits in self._numeric:
+            value = values[index]
+            if scale is not None:
+                value = value * scale
+            if digits is not None:
+                value = round(value, digits)
+            values[index] = value
+        for index in self._strings:
+            values[index] = values[index].decode("utf-8", "ignore").strip("\x00")
+        return values
+
+    def decode(self, raw, read_start=None, socket=None):
+        """Decode the fields from raw register bytes into a dict keyed by data key."""
+        return dict(zip(self.keys(socket), self.values(raw, read_start)))
+
+
+def plan_reads(parts, max_gap=READ_GAP, max_count=MAX_READ_COUNT):
+    """Merge the blocks of one unit into as few read requests as possible.
+
+    parts is a list of tuples starting with a RegisterBlock. Returns a list of
+    (start, count, parts) requests, the parts of a request ordered by start.
+    """
+    requests = []
+    for part in sorted(parts, key=lambda part: part[0].start):
+        block = part[0]
+        end = block.start + block.count
+        if requests:
+            request = requests[-1]
+            if block.start - request[1] <= max_gap and max(request[1], end) - request[0] <= max_count:
+                request[1] = max(request[1], end)
+                request[2].append(part)
+                continue
+        requests.append([block.start, end, [part]])
+    return [(start, end - start, members) for start, end, members in requests]
+
+
+PRODUCT_IDENTIFICATION_BLOCK = RegisterBlock(100, PRODUCT_IDENTIFICATION_REGISTERS)
+STATION_CLOCK_BLOCK = RegisterBlock(168, STATION_CLOCK_REGISTERS)
+STATION_STATUS_BLOCK = RegisterBlock(1100, STATION_STATUS_REGISTERS)
+SCN_BLOCK = RegisterBlock(1400, SCN_REGISTERS, 32)
+SOCKET_MEASUREMENT_BLOCK = RegisterBlock(300, SOCKET_MEASUREMENT_REGISTERS, 62)
+SOCKET_ENERGY_BLOCK = RegisterBlock(362, SOCKET_ENERGY_REGISTERS, 63)
+SOCKET_STATUS_BLOCK = RegisterBlock(1200, SOCKET_STATUS_REGISTERS)
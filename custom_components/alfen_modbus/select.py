@@ -1,18 +1,15 @@
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional
 
 from .const import (
     DOMAIN,
     ATTR_MANUFACTURER,
-    CONTROL_PHASE,
-    CONTROL_PHASE_MODES,
 )
+from .descriptions import SELECT_DESCRIPTIONS
 
 from homeassistant.const import CONF_NAME
 from homeassistant.components.select import SelectEntity
 
-from homeassistant.core import callback
-
 from .entity import AlfenEntity
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,67 +27,25 @@ async def async_setup_entry(hass, entry, async_add_entities) -> None:
     }
 
     entities = []
-
-    # If a meter is available add export control
-    for select_info in CONTROL_PHASE:
-        select = AlfenSelect(
-            hub_name,
-            hub,
-            device_info,
-            1,
-            select_info[0],
-            select_info[1],
-            select_info[2],
-            select_info[3],
-        )
-        entities.append(select)
-
-    # If a second socket is available, add the controls
-    if hub.has_socket_2:
-        for select_info in CONTROL_PHASE:
-            select = AlfenSelect(
-                hub_name,
-                hub,
-                device_info,
-                2,
-                select_info[0],
-                select_info[1],
-                select_info[2],
-                select_info[3],
-            )
-            entities.append(select)    
+    for socket in (1, 2) if hub.has_socket_2 else (1,):
+        for description in SELECT_DESCRIPTIONS[socket]:
+            entities.append(AlfenSelect(hub_name, hub, device_info, socket, description))
 
     async_add_entities(entities)
     return True
 
-def get_key(my_dict, search):
-    for k, v in my_dict.items():
-        if v == search:
-            return k
-    return None
-
 class AlfenSelect(AlfenEntity, SelectEntity):
     """Representation of an Alfen Modbus select."""
 
-    def __init__(self,
-                 platform_name,
-                 hub,
-                 device_info,
-                 socket,
-                 name,
-                 key,
-                 register,
-                 options
-    ) -> None:
+    def __init__(self, platform_name, hub, device_info, socket, description) -> None:
         """Initialize the selector."""
         super().__init__(hub, device_info)
         self._platform_name = platform_name
-        self._name = name+str(socket)
+        self._description = description
+        self._name = description.name
         self._socket = socket
-        self._key = key+str(socket)
-        self._register = register
-        self._option_dict = options
-        self._attr_options = list(options.values())
+        self._key = description.key
+        self._attr_options = list(description.options)
 
     @property
     def name(self) -> str:
@@ -108,9 +63,8 @@ class AlfenSelect(AlfenEntity, SelectEntity):
 
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
-        new_mode = get_key(self._option_dict, option)
+        new_mode = self._description.option_values[option]
         payload = self._hub._client.convert_to_registers(int(new_mode), data_type=self._hub._client.DATATYPE.UINT16, word_order="big")                   
-        await self._hub.write_registers(unit=self._socket, address=self._register, payload=payload)       
+        self._hub.async_queue_write(self._socket, self._description.register, payload)
         self._hub.data[self._key] = option
-        self.hass.async_create_task(self._hub.async_refresh_modbus_data())
         self.async_write_ha_state()
@@ -1,26 +1,19 @@
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional
 from .const import (
-    SENSOR_TYPES,
-    SOCKET1_SENSOR_TYPES,
-    SOCKET2_SENSOR_TYPES,
-    SCN_SENSOR_TYPES,
+    SITE_NAME,
+    DATA_FLEET,
     DOMAIN,
-    METER_TYPE,
-    METER_STATE_MODES,
-    AVAILABILITY_MODES,
-    BOOLEAN_EXPLAINED,
-    CONTROL_PHASE_MODES,
     ATTR_MANUFACTURER,
 )
-from datetime import datetime
-from homeassistant.const import CONF_NAME, UnitOfEnergy, UnitOfPower
-from homeassistant.components.sensor import (
-    SensorStateClass,
-    SensorEntity,
-    SensorDeviceClass
+from .descriptions import (
+    SENSOR_DESCRIPTIONS,
+    SCN_SENSOR_DESCRIPTIONS,
+    SOCKET_SENSOR_DESCRIPTIONS,
+    SITE_SENSOR_DESCRIPTIONS,
 )
-
+from homeassistant.const import CONF_NAME
+from homeassistant.components.sensor import SensorEntity
 from homeassistant.core import callback
 
 from .entity import AlfenEntity
@@ -40,81 +33,51 @@ async def async_setup_entry(hass, entry, async_add_entities):
         "sw_version": hub.data.get("firmwareVersion", "Unknown"),
     }
     
-    entities = []
-    for sensor_info in SENSOR_TYPES.values():
-        sensor = AlfenSensor(
-            hub_name,
-            hub,
-            device_info,
-            sensor_info[0],
-            sensor_info[1],
-            sensor_info[2],
-            sensor_info[3],
-        )
-        entities.append(sensor)
-    
+    descriptions = list(SENSOR_DESCRIPTIONS)
     if hub.read_scn:
-        for meter_sensor_info in SCN_SENSOR_TYPES.values():
-            sensor = AlfenSensor(
-                hub_name,
-                hub,
-                device_info,
-                meter_sensor_info[0],
-                meter_sensor_info[1],
-                meter_sensor_info[2],
-                meter_sensor_info[3],
-            )
-            entities.append(sensor)
- 
-    for meter_sensor_info in SOCKET1_SENSOR_TYPES.values():
-        sensor = AlfenSensor(
-            hub_name,
-            hub,
-            device_info,
-            meter_sensor_info[0],
-            meter_sensor_info[1],
-            meter_sensor_info[2],
-            meter_sensor_info[3],
-        )
-        entities.append(sensor)
-        
+        descriptions.extend(SCN_SENSOR_DESCRIPTIONS)
+    descriptions.extend(SOCKET_SENSOR_DESCRIPTIONS[1])
     if hub.read_socket_2:
-        for meter_sensor_info in SOCKET2_SENSOR_TYPES.values():
-            sensor = AlfenSensor(
-                hub_name,
-                hub,
-                device_info,
-                meter_sensor_info[0],
-                meter_sensor_info[1],
-                meter_sensor_info[2],
-                meter_sensor_info[3],
-            )
-            entities.append(sensor)
+        descriptions.extend(SOCKET_SENSOR_DESCRIPTIONS[2])
+    entities = [
+        AlfenSensor(hub_name, hub, device_info, description)
+        for description in descriptions
+    ]
+
     async_add_entities(entities)
+
+    # The site sensors are added once, by one of the entries
+    fleet = hass.data[DATA_FLEET]
+    site_device_info = {
+        "identifiers": {(DOMAIN, SITE_NAME)},
+        "name": SITE_NAME,
+        "manufacturer": ATTR_MANUFACTURER,
+    }
+
+    @callback
+    def add_site_sensors():
+        async_add_entities(
+            AlfenSensor(SITE_NAME, fleet, site_device_info, description)
+            for description in SITE_SENSOR_DESCRIPTIONS
+        )
+
+    fleet.async_add_site_entry(entry.entry_id, add_site_sensors)
     return True
 
 
 class AlfenSensor(AlfenEntity, SensorEntity):
     """Representation of an Alfen Modbus sensor."""
 
-    def __init__(self, platform_name, hub, device_info, name, key, unit, icon):
+    def __init__(self, platform_name, hub, device_info, description):
         """Initialize the sensor."""
         super().__init__(hub, device_info)
         self._platform_name = platform_name
-        self._key = key
-        if not hub.has_socket_2:
-            if name.startswith("S1 "):
-                name = name.replace("S1 ","")
+        self._description = description
+        self._key = description.key
+        name = description.name
+        if not hub.has_socket_2 and name.startswith("S1 "):
+            name = name[3:]
         self._name = name
-        self._unit_of_measurement = unit
-        self._icon = icon
-        self._device_info = device_info
-        self._attr_state_class = SensorStateClass.MEASUREMENT
-        if self._unit_of_measurement == UnitOfEnergy.KILO_WATT_HOUR or self._unit_of_measurement == UnitOfEnergy.WATT_HOUR:
-            self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-            self._attr_device_class = SensorDeviceClass.ENERGY
-        if self._unit_of_measurement == UnitOfPower.WATT :
-            self._attr_device_class = SensorDeviceClass.POWER
 
     @property
     def name(self):
@@ -128,29 +91,34 @@ class AlfenSensor(AlfenEntity, SensorEntity):
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement."""
-        return self._unit_of_measurement
+        return self._description.unit
 
     @property
     def icon(self):
         """Return the sensor icon."""
-        return self._icon
+        return self._description.icon
+
+    @property
+    def device_class(self):
+        """Return the device class."""
+        return self._description.device_class
+
+    @property
+    def state_class(self):
+        """Return the state class."""
+        return self._description.state_class
+
+    @property
+    def entity_category(self):
+        """Return the entity category."""
+        return self._description.entity_category
 
     @property
     def state(self):
         """Return the state of the sensor."""
-        if self._key in self._hub.data and self._hub.data[self._key] == self._hub.data[self._key]: #check for NaN
-            if self._key in ["socket_1_meterType", "socket_2_meterType"] and self._hub.data[self._key] in METER_TYPE:
-                return METER_TYPE[self._hub.data[self._key]]
-            elif self._key in ["socket_1_meterstate", "socket_2_meterstate"] and self._hub.data[self._key] in METER_STATE_MODES:
-                return METER_STATE_MODES[self._hub.data[self._key]]     
-            elif self._key in ["socket_1_available", "socket_2_available"] and self._hub.data[self._key] in AVAILABILITY_MODES:
-                return AVAILABILITY_MODES[self._hub.data[self._key]]   
-            elif self._key in ["backofficeConnected","socket_1_setpointAccounted", "socket_2_setpointAccounted","socket_1_carconnected","socket_2_carconnected","socket_1_carcharging","socket_2_carcharging"] and self._hub.data[self._key] in BOOLEAN_EXPLAINED:
-                return BOOLEAN_EXPLAINED[self._hub.data[self._key]]        
-            elif self._key in ["socket_1_chargephases", "socket_2_chargephases"] and self._hub.data[self._key] in CONTROL_PHASE_MODES:
-                return CONTROL_PHASE_MODES[self._hub.data[self._key]]  
-            else:
-                return self._hub.data[self._key]           
+        value = self._hub.data.get(self._key)
+        if value is not None and value == value: #check for NaN
+            return self._description.formatter(value)
 
     @property
     def extra_state_attributes(self):         
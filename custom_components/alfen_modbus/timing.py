@@ -0,0 +1,66 @@
+"""Rolling timing statistics of the poll phases."""
+from collections import deque
+from contextlib import contextmanager
+import time
+
+from .const import TIMING_SAMPLES, TIMING_BUCKETS_MS
+
+
+class PhaseTimings:
+    """Keeps the last TIMING_SAMPLES durations of each poll phase.
+
+    Durations are recorded in seconds and reported in milliseconds.
+    """
+
+    def __init__(self):
+        """Initialize the timings."""
+        self._samples = {}
+
+    def record(self, phase, duration):
+        """Record the duration of a phase, in seconds."""
+        samples = self._samples.get(phase)
+        if samples is None:
+            samples = self._samples[phase] = deque(maxlen=TIMING_SAMPLES)
+        samples.append(duration)
+
+    @contextmanager
+    def measure(self, phase):
+        """Record the time spent in the with block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def percentile(self, phase, percent):
+        """Return a percentile of a phase in milliseconds, or None without samples."""
+        samples = self._samples.get(phase)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return round(ordered[index] * 1000, 1)
+
+    def summary(self):
+        """Return the statistics and histogram of every phase."""
+        summary = {}
+        for phase, samples in sorted(self._samples.items()):
+            ordered = sorted(samples)
+            histogram = dict.fromkeys([*(f"<{edge}" for edge in TIMING_BUCKETS_MS), "more"], 0)
+            for sample in ordered:
+                ms = sample * 1000
+                for edge in TIMING_BUCKETS_MS:
+                    if ms < edge:
+                        histogram[f"<{edge}"] += 1
+                        break
+                else:
+                    histogram["more"] += 1
+            summary[phase] = {
+                "count": len(ordered),
+                "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p50": round(ordered[len(ordered) // 2] * 1000, 2),
+                "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                "max": round(ordered[-1] * 1000, 2),
+                "histogram_ms": histogram,
+            }
+        return summary
@@ -0,0 +1,267 @@
+"""
+Benchmark for the alfen_modbus hub against the Alfen Eve simulator
+
+Starts one simulated charger per hub in-process on free ports and drives
+the real AlfenModbusHub (read_modbus_data, write_registers and the register block
+decoders) with a minimal stand-in for the Home Assistant object.
+
+For every combination of hub count, socket count and injected latency it
+reports:
+  - polls/sec over all hubs
+  - p50/p99 poll latency
+  - p50 write latency
+  - decode cost per field
+  - memory per hub after the first poll
+
+Latency is injected by a TCP proxy in front of the simulator that delays
+every request and every response. --faults loads the simulator's fault
+injection file (see simulator.py) for drops, disconnects, exceptions and
+per unit latency; the polls and writes that fail are counted.
+
+Requires homeassistant and pymodbus, run from the simulator directory:
+  python benchmark.py --hubs 1 10 50 --sockets 1 2 --latency 0 5 --duration 5
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import time
+import tracemalloc
+
+from pymodbus.exceptions import ModbusException
+
+from simulator import create_server, create_store, encode_float, load_overrides, ADDRESS_PRODUCT
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components.alfen_modbus import AlfenFleet, AlfenModbusHub  # noqa: E402
+from custom_components.alfen_modbus.registers import (  # noqa: E402
+    registers_to_bytes,
+    SOCKET_MEASUREMENT_BLOCK,
+    SOCKET_ENERGY_BLOCK,
+)
+
+HOST = "127.0.0.1"
+WRITES_PER_HUB = 10
+DECODE_ITERATIONS = 2000
+
+logging.getLogger().setLevel(logging.WARNING)
+# pymodbus dumps its frame trace on every injected fault
+logging.getLogger("pymodbus").setLevel(logging.CRITICAL)
+log = logging.getLogger("benchmark")
+log.setLevel(logging.INFO)
+
+
+class StubHass:
+    """The parts of HomeAssistant the hub uses, the timers run on the event loop."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+
+    def async_run_hass_job(self, job, *args):
+        result = job.target(*args)
+        if asyncio.iscoroutine(result):
+            return asyncio.ensure_future(result)
+        return result
+
+    def async_create_task(self, target, name=None):
+        return asyncio.ensure_future(target)
+
+    def async_create_background_task(self, target, name):
+        return asyncio.ensure_future(target)
+
+
+def percentile(samples, percent):
+    """Return a percentile of the samples, None without samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def free_port():
+    """Return a TCP port that is free on the loopback interface."""
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def start_chargers(count, sockets, faults=None, seed=None):
+    """Starts simulated chargers with the given number of sockets, returns (servers, ports)."""
+    servers = []
+    ports = []
+    rng = random.Random(seed)
+    for index in range(count):
+        port = free_port()
+        server = create_server(create_store(index, sockets, faults=faults, rng=rng), (HOST, port))
+        await server.serve_forever(background=True)
+        servers.append(server)
+        ports.append(port)
+    return servers, ports
+
+
+async def start_proxy(target_port, latency):
+    """Forwards connections to the simulator, delaying every chunk by latency seconds."""
+
+    async def pipe(reader, writer):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(latency)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection(HOST, target_port)
+        try:
+            await asyncio.gather(
+                pipe(client_reader, server_writer),
+                pipe(server_reader, client_writer),
+            )
+        except asyncio.CancelledError:
+            # The connections are torn down with the benchmark case
+            pass
+
+    server = await asyncio.start_server(handle, HOST, 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def measure_decode(raw):
+    """Return the decode cost in microseconds per field."""
+    fields = 0
+    cost = 0.0
+    for block in (SOCKET_MEASUREMENT_BLOCK, SOCKET_ENERGY_BLOCK):
+        fields += len(block.keys())
+        start = time.perf_counter()
+        for _ in range(DECODE_ITERATIONS):
+            block.values(raw, SOCKET_MEASUREMENT_BLOCK.start)
+        cost += (time.perf_counter() - start) / DECODE_ITERATIONS
+    return cost / fields * 1e6
+
+
+async def run_case(hub_count, sockets, latency_ms, duration, faults=None, seed=None):
+    """Runs one benchmark case and returns its results."""
+    chargers, ports = await start_chargers(hub_count, sockets, faults, seed)
+    proxies = []
+    if latency_ms:
+        for index, port in enumerate(ports):
+            proxy, ports[index] = await start_proxy(port, latency_ms / 1000)
+            proxies.append(proxy)
+
+    hass = StubHass()
+    fleet = AlfenFleet(hass)
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    hubs = []
+    for index in range(hub_count):
+        hub = AlfenModbusHub(hass, f"bench{index}", HOST, ports[index], ADDRESS_PRODUCT, 5, False, sockets == 2, 1, fleet)
+        fleet.add_hub(hub)
+        await hub.async_connect()
+        hubs.append(hub)
+    # The first poll reads everything, including identification and energy
+    await asyncio.gather(*(hub.read_modbus_data() for hub in hubs))
+    memory = (tracemalloc.get_traced_memory()[0] - memory_before) / hub_count
+    tracemalloc.stop()
+
+    latencies = []
+    failed_polls = 0
+    end = time.perf_counter() + duration
+
+    reads = ["product", "socket_1"] + (["socket_2"] if sockets == 2 else [])
+
+    async def poll(hub):
+        nonlocal failed_polls
+        while time.perf_counter() < end:
+            started = time.monotonic()
+            start = time.perf_counter()
+            await hub.read_modbus_data()
+            latencies.append(time.perf_counter() - start)
+            if any((hub.last_update(read) or 0) < started for read in reads):
+                failed_polls += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(poll(hub) for hub in hubs))
+    elapsed = time.perf_counter() - started
+
+    writes = []
+    failed_writes = 0
+    payload = encode_float(16.0)
+    for hub in hubs:
+        for _ in range(WRITES_PER_HUB):
+            start = time.perf_counter()
+            try:
+                await hub.write_registers(1, 1210, payload)
+            except (ModbusException, OSError):
+                failed_writes += 1
+            writes.append(time.perf_counter() - start)
+
+    response = await hubs[0].read_holding_registers(1, SOCKET_MEASUREMENT_BLOCK.start, 125)
+    decode_cost = measure_decode(registers_to_bytes(response.registers))
+
+    for hub in hubs:
+        hub.close()
+    for proxy in proxies:
+        proxy.close()
+    for charger in chargers:
+        await charger.shutdown()
+
+    return {
+        "hubs": hub_count,
+        "sockets": sockets,
+        "latency_ms": latency_ms,
+        "polls_per_sec": round(len(latencies) / elapsed, 1),
+        "poll_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "poll_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "write_p50_ms": round(percentile(writes, 50) * 1000, 2),
+        "failed_polls": failed_polls,
+        "failed_writes": failed_writes,
+        "decode_us_per_field": round(decode_cost, 3),
+        "memory_kb_per_hub": round(memory / 1024, 1),
+    }
+
+
+async def run(args):
+    faults = load_overrides(args.faults) if args.faults else None
+    results = []
+    for hub_count, sockets, latency_ms in itertools.product(args.hubs, args.sockets, args.latency):
+        log.info(f"Running {hub_count} hub(s), {sockets} socket(s), {latency_ms} ms latency...")
+        results.append(await run_case(hub_count, sockets, latency_ms, args.duration, faults, args.seed))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{column:>{len(column)}}" for column in columns))
+    for result in results:
+        print("  ".join(f"{result[column]!s:>{len(column)}}" for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the alfen_modbus hub against the simulator')
+    parser.add_argument('--hubs', type=int, nargs='+', default=[1, 10],
+                        help='Number of hubs polling concurrently (default: 1 10)')
+    parser.add_argument('--sockets', type=int, nargs='+', choices=[1, 2], default=[1, 2],
+                        help='Number of sockets per station (default: 1 2)')
+    parser.add_argument('--latency', type=float, nargs='+', default=[0],
+                        help='Injected one-way latency in ms (default: 0)')
+    parser.add_argument('--duration', type=float, default=5,
+                        help='Seconds of polling per case (default: 5)')
+    parser.add_argument('--faults', metavar='FILE',
+                        help='Fault injection file of the simulator')
+    parser.add_argument('--seed', type=int, help='Seed for the fault injection')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
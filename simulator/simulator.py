@@ -14,15 +14,68 @@ Register addressing:
   ModbusDeviceContext adds +1 to read addresses internally, so we store data
   at block[N] to have it appear at register N+1 from client's perspective.
   Therefore, to have client read register N, we store at block[N-1].
+
+Charging sessions:
+  Every socket walks mode 3 A -> B1 -> C2 -> B2 -> A. While charging the
+  currents follow the applied max current and the phases in 1215 and the
+  energy registers integrate the power. The max current valid time in 1208
+  counts down from 60 s after every write of 1210, once it runs out the
+  safe current in 1212 applies. --speed runs the sessions faster.
+
+Smart charging network:
+  The station unit reports the SCN registers 1400-1431. Consecutive
+  chargers form networks of --scn-size stations (default: all chargers),
+  every station of a network reports the same summed phase currents.
+
+Scale mode:
+  --chargers N serves N independent chargers on consecutive ports starting
+  at --port, all from one asyncio loop. The register contents are encoded
+  once and copied per charger; every charger gets its own serial number.
+  --registers FILE overrides registers per charger from a JSON file:
+
+    {
+      "*": {"200": {"1105": {"uint16": 2}}},
+      "3": {"1": {"1201": {"string": "B2", "length": 10},
+                  "1210": {"float": 10.0}}}
+    }
+
+  "*" applies to every charger, numeric keys to the charger with that index.
+  Supported types: uint16, int16, uint32, uint64, float, double, string, raw.
+
+Fault injection:
+  --faults FILE configures faults per charger and unit, keyed like the
+  register overrides:
+
+    {
+      "*": {"1": {"latency": {"distribution": "normal", "mean": 20, "stddev": 5}}},
+      "0": {"2": {"drop": 0.05,
+                  "disconnect_after": 500,
+                  "exceptions": [{"start": 1200, "end": 1215, "code": 6,
+                                  "probability": 0.1}]}}
+    }
+
+  latency     delay in ms before answering, distribution fixed (value),
+              uniform (min, max), normal (mean, stddev) or exponential (mean)
+  drop        probability that a request is never answered
+  disconnect_after
+              close the charger's TCP sessions on every Nth transaction
+  exceptions  Modbus exception code for requests touching start-end
+
+  With faults configured requests for unknown units are left unanswered,
+  that is how the server drops requests. --seed makes the faults repeatable.
 """
 import asyncio
+import json
 import logging
+import random
 import struct
 import argparse
 import subprocess
 import sys
 import os
-from pymodbus.server import StartAsyncTcpServer
+from pymodbus.constants import ExcCodes
+from pymodbus.exceptions import NoSuchIdException
+from pymodbus.server import ModbusTcpServer
 from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext, ModbusDeviceContext
 from pymodbus.pdu.device import ModbusDeviceIdentification
 
@@ -31,6 +84,7 @@ DEFAULT_PORT = 502  # Standard Modbus TCP port
 ADDRESS_PRODUCT = 200
 ADDRESS_SOCKET_1 = 1
 ADDRESS_SOCKET_2 = 2
+SERIAL_NUMBER = 108752
 
 # Logging setup
 logging.basicConfig()
@@ -155,7 +209,7 @@ def setup_product_context():
     block.setValues(reg(122), encode_uint16(3))  # Modbus Table Version
     block.setValues(reg(123), encode_string("5.16.0-4095", 34))  # Firmware (17 regs)
     block.setValues(reg(140), encode_string("NG920-60559", 34))  # Platform (17 regs)
-    block.setValues(reg(157), encode_string("ACE0108752", 22))   # Serial (11 regs)
+    block.setValues(reg(157), encode_string(f"ACE{SERIAL_NUMBER:07d}", 22))   # Serial (11 regs)
     
     # Time registers (168-178)
     import datetime
@@ -188,7 +242,7 @@ def setup_socket_context(socket_id):
     # === Meter Measurements (Registers 300-424) ===
     # HA reads registers 300-424 (125 registers) and uses offsets from 300
     block.setValues(reg(300), encode_uint16(3))      # Meter State (offset 0)
-    block.setValues(reg(301), encode_uint32(1500))   # Meter Age ms (offset 1, 4 regs but read as UINT16)
+    block.setValues(reg(301), encode_uint64(1500))   # Meter Age ms (offset 1, UINT64)
     block.setValues(reg(305), encode_uint16(1))      # Meter Type (offset 5)
     
     # Voltages L-N (float32, V) - offset 6, 8, 10
@@ -276,40 +330,355 @@ def setup_socket_context(socket_id):
 # Simulation Logic
 # ============================================================================
 
-async def update_simulation(context):
+MAX_CURRENT_VALID_TIME = 60  # Seconds a written max current stays valid
+MIN_CHARGING_CURRENT = 6.0   # Below this the car pauses charging
+IDLE_TIME = (60, 600)        # Seconds without a car, drawn uniformly
+CONNECTED_TIME = (10, 60)    # Seconds in B1 before charging starts
+FINISHED_TIME = (60, 300)    # Seconds in B2 before the car leaves
+SESSION_ENERGY = (5000, 30000)  # Wh a car wants per session
+CAR_MAX_CURRENTS = (16.0, 32.0)
+
+# Register groups written at once, each with a single setValues
+MEASUREMENTS = struct.Struct(">QH28f")  # 301-361: meter age, type, voltages ... reactive power
+REAL_ENERGY = struct.Struct(">4d")      # 362-377: real energy delivered L1-L3, sum
+OTHER_ENERGY = struct.Struct(">8d")     # 392-423: apparent and reactive energy L1-L3, sum
+STATUS = struct.Struct(">10sfI")        # 1201-1209: mode 3 state, applied max current, valid time
+CONTROL = struct.Struct(">ffHH")        # 1210-1215: max current, safe current, accounted, phases
+FLOAT = struct.Struct(">f")
+SCN = struct.Struct(">8sH3f3f3f3IfH")  # 1400-1431: name, sockets, currents, actual max, max, valid times, safe, enabled
+SCN_MAX_CURRENT = 63.0  # Per phase
+SCN_SAFE_CURRENT = 6.0
+
+def read_struct(device, register, layout):
+    """Reads a register group and unpacks it."""
+    values = device.getValues(3, register, layout.size // 2)
+    return layout.unpack(struct.pack(f">{len(values)}H", *values))
+
+def write_struct(device, register, layout, *values):
+    """Packs a register group and writes it."""
+    data = layout.pack(*values)
+    device.setValues(3, register, list(struct.unpack(f">{len(data) // 2}H", data)))
+
+class DeviceContext(ModbusDeviceContext):
+    """A unit that notices the client writing the max current."""
+
+    def __init__(self, block):
+        super().__init__(hr=block)
+        self.max_current_written = False
+
+    async def async_setValues(self, func_code, address, values):
+        # The simulation itself writes through setValues
+        if address <= 1211 and address + len(values) > 1210:
+            self.max_current_written = True
+        return self.setValues(func_code, address, values)
+
+class SocketSession:
+    """Charging sessions of one socket.
+
+    Walks mode 3 A -> B1 -> C2 -> B2 -> A. While charging the currents follow
+    the applied max current and the phases in 1215, the energy registers
+    integrate the power and the max current valid time counts down until the
+    client writes 1210 again, after which the safe current applies.
+    """
+
+    def __init__(self, product, device, rng, speed=1):
+        self.product = product
+        self.device = device
+        self.rng = rng
+        self.speed = speed
+        measurements = read_struct(device, 301, MEASUREMENTS)
+        self.meter_type = measurements[1]
+        self.voltages = measurements[2:8]
+        self.power_factors = measurements[13:17]
+        self.frequency = measurements[17]
+        self.currents = list(measurements[9:12])
+        self.real_energy = list(read_struct(device, 362, REAL_ENERGY))
+        self.other_energy = list(read_struct(device, 392, OTHER_ENERGY))
+        mode3, _, self.valid_time = read_struct(device, 1201, STATUS)
+        self.state = mode3.rstrip(b"\x00").decode()
+        self.state_time = 0
+        self.session_energy = 0
+        self.wanted_energy = rng.uniform(*SESSION_ENERGY)
+        self.car_max_current = rng.choice(CAR_MAX_CURRENTS)
+
+    def advance(self, seconds):
+        """Moves the session on, returns the next mode 3 state."""
+        rng = self.rng
+        self.state_time -= seconds
+        if self.state.startswith("C"):
+            if self.session_energy >= self.wanted_energy:
+                self.state_time = rng.uniform(*FINISHED_TIME)
+                return "B2"
+        elif self.state_time <= 0:
+            if self.state.startswith("A"):
+                self.state_time = rng.uniform(*CONNECTED_TIME)
+                return "B1"
+            if self.state == "B1":
+                self.session_energy = 0
+                self.wanted_energy = rng.uniform(*SESSION_ENERGY)
+                self.car_max_current = rng.choice(CAR_MAX_CURRENTS)
+                return "C2"
+            self.state_time = rng.uniform(*IDLE_TIME)
+            return "A"
+        return self.state
+
+    def update(self, elapsed):
+        """Updates the socket registers after elapsed wall clock seconds."""
+        device = self.device
+        seconds = elapsed * self.speed
+        if device.max_current_written:
+            device.max_current_written = False
+            self.valid_time = MAX_CURRENT_VALID_TIME
+        else:
+            self.valid_time = max(0, self.valid_time - elapsed)
+        max_current, safe_current, _, phases = read_struct(device, 1210, CONTROL)
+        station_max_current = read_struct(self.product, 1100, FLOAT)[0]
+        applied = min(max_current if self.valid_time > 0 else safe_current, station_max_current)
+
+        self.state = self.advance(seconds)
+        current = 0.0
+        if self.state == "C2" and applied >= MIN_CHARGING_CURRENT:
+            current = min(applied, self.car_max_current)
+        phase_count = 1 if phases == 1 else 3
+        self.currents = currents = [
+            current * self.rng.uniform(0.99, 1.01) if phase < phase_count else 0.0
+            for phase in range(3)
+        ]
+        apparent = [voltage * current for voltage, current in zip(self.voltages, currents)]
+        real = [power * factor for power, factor in zip(apparent, self.power_factors)]
+        reactive = [max(0.0, s * s - p * p) ** 0.5 for s, p in zip(apparent, real)]
+        apparent.append(sum(apparent))
+        real.append(sum(real))
+        reactive.append(sum(reactive))
+
+        hours = seconds / 3600
+        for index in range(4):
+            self.real_energy[index] += real[index] * hours
+            self.other_energy[index] += apparent[index] * hours
+            self.other_energy[4 + index] += reactive[index] * hours
+        self.session_energy += real[3] * hours
+
+        neutral = abs(currents[0] - currents[1]) if phase_count == 3 else currents[0]
+        write_struct(
+            device, 301, MEASUREMENTS,
+            int(self.rng.uniform(200, 1500)), self.meter_type, *self.voltages,
+            neutral, *currents, sum(currents), *self.power_factors, self.frequency,
+            *real, *apparent, *reactive,
+        )
+        write_struct(device, 362, REAL_ENERGY, *self.real_energy)
+        write_struct(device, 392, OTHER_ENERGY, *self.other_energy)
+        write_struct(device, 1201, STATUS, self.state.encode(), applied, int(self.valid_time))
+
+def update_network(name, products, sessions):
+    """Writes the smart charging network registers to every station of the network."""
+    currents = [sum(session.currents[phase] for session in sessions) for phase in range(3)]
+    for product in products:
+        write_struct(
+            product, 1400, SCN,
+            name.encode(), len(sessions), *currents,
+            *[SCN_MAX_CURRENT] * 3, *[SCN_MAX_CURRENT] * 3, 0, 0, 0,
+            SCN_SAFE_CURRENT, 0,
+        )
+
+async def update_simulation(stores, rng=None, speed=1, scn_size=0):
     """Updates simulation state periodically.
     
-    Mirrors written Max Current (1210) to Actual Applied Max Current (1206).
+    Runs the charging sessions of every socket the chargers report, see
+    SocketSession. speed makes the sessions and energy run faster than the
+    wall clock, the max current valid time always follows the wall clock.
+    Consecutive chargers form smart charging networks of scn_size stations,
+    by default all chargers are one network.
     """
+    rng = rng or random.Random()
+    sessions = []
+    networks = []
+    scn_size = scn_size or len(stores)
+    for first in range(0, len(stores), scn_size):
+        products = []
+        network_sessions = []
+        for store in stores[first:first + scn_size]:
+            product = store[ADDRESS_PRODUCT]
+            products.append(product)
+            sockets = product.getValues(3, 1105, 1)[0]
+            for unit in [ADDRESS_SOCKET_1, ADDRESS_SOCKET_2][:sockets]:
+                network_sessions.append(SocketSession(product, store[unit], rng, speed))
+        networks.append((f"SCN{len(networks) + 1}", products, network_sessions))
+        sessions.extend(network_sessions)
+
+    loop = asyncio.get_running_loop()
+    last = loop.time()
     while True:
+        for network in networks:
+            update_network(*network)
         await asyncio.sleep(1)
-        
-        for unit in [ADDRESS_SOCKET_1, ADDRESS_SOCKET_2]:
-            try:
-                slave = context[unit]
-                # Read Modbus Slave Max Current (register 1210)
-                # Context adds +1, so read from internal address 1211
-                values = slave.getValues(3, 1210, 2)
-                if isinstance(values, list) and len(values) == 2:
-                    # Write to Actual Applied Max Current (register 1206)
-                    slave.setValues(3, 1206, values)
-            except Exception:
-                pass
+        now = loop.time()
+        for session in sessions:
+            session.update(now - last)
+        last = now
+
+# ============================================================================
+# Chargers
+# ============================================================================
+
+ENCODERS = {
+    "uint16": encode_uint16,
+    "int16": encode_int16,
+    "uint32": encode_uint32,
+    "uint64": encode_uint64,
+    "float": encode_float,
+    "double": encode_double,
+    "raw": list,
+}
+
+_templates = {}
+
+def template_values(unit):
+    """Returns the register values of a unit, encoded once for all chargers."""
+    values = _templates.get(unit)
+    if values is None:
+        if unit == ADDRESS_PRODUCT:
+            context = setup_product_context()
+        else:
+            context = setup_socket_context(unit)
+        values = _templates[unit] = context.store["h"].values
+    return values
+
+def encode_value(spec):
+    """Encodes a register override like {"float": 16.0} into registers."""
+    if "string" in spec:
+        return encode_string(spec["string"], spec.get("length", len(spec["string"])))
+    for kind, encoder in ENCODERS.items():
+        if kind in spec:
+            return encoder(spec[kind])
+    raise ValueError(f"Unknown register type in {spec}")
+
+def load_overrides(path):
+    """Loads per charger settings, register overrides or faults, from a JSON file."""
+    with open(path) as file:
+        return json.load(file)
+
+def unit_settings(settings, index):
+    """Returns the settings of one charger per unit, "*" merged with its own."""
+    units = {}
+    for key in ("*", str(index)):
+        for unit, unit_settings in (settings or {}).get(key, {}).items():
+            units.setdefault(int(unit), {}).update(unit_settings)
+    return units
+
+def create_store(index=0, sockets=1, overrides=None, faults=None, rng=None):
+    """Creates the server context of one charger with the station and both socket units.
+
+    The blocks are copies of the shared templates, so creating hundreds of
+    chargers does not encode the registers again.
+    """
+    unit_faults = unit_settings(faults, index)
+    devices = {}
+    for unit in (ADDRESS_PRODUCT, ADDRESS_SOCKET_1, ADDRESS_SOCKET_2):
+        block = ModbusSequentialDataBlock(0, template_values(unit))
+        if unit in unit_faults:
+            devices[unit] = FaultyDeviceContext(block, unit_faults[unit], rng or random.Random())
+        else:
+            devices[unit] = DeviceContext(block)
+    product = devices[ADDRESS_PRODUCT]
+    product.setValues(3, 157, encode_string(f"ACE{SERIAL_NUMBER + index:07d}", 22))
+    product.setValues(3, 1105, encode_uint16(sockets))
+
+    for unit, registers in unit_settings(overrides, index).items():
+        for register, spec in registers.items():
+            devices[unit].setValues(3, int(register), encode_value(spec))
+
+    return ModbusServerContext(devices=devices, single=False)
+
+def create_server(store, address, identity=None):
+    """Creates the Modbus TCP server of one charger."""
+    faulty = [device for _, device in store if isinstance(device, FaultyDeviceContext)]
+    # Dropped requests are raised as a missing device, which is left unanswered
+    server = ModbusTcpServer(
+        store, identity=identity, address=address, ignore_missing_devices=bool(faulty)
+    )
+    for device in faulty:
+        device.server = server
+    return server
+
+# ============================================================================
+# Fault injection
+# ============================================================================
+
+class DroppedRequest(NoSuchIdException):
+    """Leaves a request unanswered, so the client runs into its timeout."""
+
+def sample_latency(latency, rng):
+    """Returns a delay in seconds drawn from a latency distribution in ms."""
+    distribution = latency.get("distribution", "fixed")
+    if distribution == "fixed":
+        delay = latency["value"]
+    elif distribution == "uniform":
+        delay = rng.uniform(latency["min"], latency["max"])
+    elif distribution == "normal":
+        delay = rng.gauss(latency["mean"], latency["stddev"])
+    elif distribution == "exponential":
+        delay = rng.expovariate(1 / latency["mean"])
+    else:
+        raise ValueError(f"Unknown latency distribution {distribution}")
+    return max(0, delay) / 1000
+
+class FaultyDeviceContext(DeviceContext):
+    """A unit that delays, drops, disconnects or refuses requests."""
+
+    def __init__(self, block, faults, rng):
+        super().__init__(block)
+        self.faults = faults
+        self.rng = rng
+        self.server = None
+        self.transactions = 0
+
+    async def inject(self, address, count):
+        """Applies the faults to a request, returns an exception code or None."""
+        self.transactions += 1
+        faults = self.faults
+        if "latency" in faults:
+            await asyncio.sleep(sample_latency(faults["latency"], self.rng))
+        disconnect_after = faults.get("disconnect_after")
+        if disconnect_after and self.transactions % disconnect_after == 0 and self.server:
+            log.info(f"Disconnecting after {self.transactions} transactions")
+            for connection in list(self.server.active_connections.values()):
+                connection.close()
+            raise DroppedRequest("disconnected")
+        if self.rng.random() < faults.get("drop", 0):
+            raise DroppedRequest("dropped")
+        for fault in faults.get("exceptions", ()):
+            if (
+                address <= fault["end"]
+                and address + count > fault["start"]
+                and self.rng.random() < fault.get("probability", 1)
+            ):
+                return ExcCodes(fault["code"])
+        return None
+
+    async def async_getValues(self, func_code, address, count=1):
+        code = await self.inject(address, count)
+        if code is not None:
+            return code
+        return self.getValues(func_code, address, count)
+
+    async def async_setValues(self, func_code, address, values):
+        code = await self.inject(address, len(values))
+        if code is not None:
+            return code
+        return await super().async_setValues(func_code, address, values)
 
 # ============================================================================
 # Main
 # ============================================================================
 
-async def run_server(port):
-    """Starts the Modbus TCP server."""
-    # Kill any ghost processes holding the port
-    kill_ghost_processes(port)
+async def run_server(port, chargers=1, sockets=1, overrides=None, faults=None, seed=None, speed=1, scn_size=0):
+    """Starts a Modbus TCP server for every charger on consecutive ports."""
+    # Kill any ghost processes holding the ports
+    for index in range(chargers):
+        kill_ghost_processes(port + index)
     
-    store = ModbusServerContext(devices={
-        ADDRESS_PRODUCT: setup_product_context(),
-        ADDRESS_SOCKET_1: setup_socket_context(1),
-        ADDRESS_SOCKET_2: setup_socket_context(2)
-    }, single=False)
+    rng = random.Random(seed)
+    stores = [create_store(index, sockets, overrides, faults, rng) for index in range(chargers)]
 
     identity = ModbusDeviceIdentification()
     identity.VendorName = 'Alfen B.V.'
@@ -319,28 +688,48 @@ async def run_server(port):
     identity.ModelName = 'NG920'
     identity.MajorMinorRevision = '5.16.0'
 
-    log.info(f"Starting Alfen Eve Simulator on port {port}...")
-    log.info(f"  Unit 200: Product/Station information")
-    log.info(f"  Unit 1: Socket 1")
-    log.info(f"  Unit 2: Socket 2")
-    
-    server_task = asyncio.create_task(StartAsyncTcpServer(
-        context=store,
-        identity=identity,
-        address=("0.0.0.0", port)
-    ))
+    if chargers == 1:
+        log.info(f"Starting Alfen Eve Simulator on port {port}...")
+    else:
+        log.info(f"Starting {chargers} Alfen Eve Simulators on ports {port}-{port + chargers - 1}...")
+        logging.getLogger("pymodbus").setLevel(logging.WARNING)
+    log.info("  Unit 200: Product/Station information")
+    log.info("  Unit 1: Socket 1")
+    log.info("  Unit 2: Socket 2")
     
-    simulator_logic = asyncio.create_task(update_simulation(store))
+    for index, store in enumerate(stores):
+        server = create_server(store, ("0.0.0.0", port + index), identity)
+        await server.serve_forever(background=True)
     
-    await asyncio.gather(server_task, simulator_logic)
+    await update_simulation(stores, rng, speed, scn_size)
 
 def main():
     parser = argparse.ArgumentParser(description='Alfen Eve Single Pro Modbus Simulator')
     parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT,
                         help=f'TCP port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('-n', '--chargers', type=int, default=1,
+                        help='Number of chargers, served on consecutive ports (default: 1)')
+    parser.add_argument('-s', '--sockets', type=int, choices=[1, 2], default=1,
+                        help='Number of sockets per charger (default: 1)')
+    parser.add_argument('-r', '--registers', metavar='FILE',
+                        help='JSON file with register overrides per charger')
+    parser.add_argument('-f', '--faults', metavar='FILE',
+                        help='JSON file with latency, drops, disconnects and exceptions per unit')
+    parser.add_argument('--seed', type=int,
+                        help='Seed for the fault injection and charging sessions')
+    parser.add_argument('--speed', type=float, default=1,
+                        help='Charging sessions run this many times faster than real time (default: 1)')
+    parser.add_argument('--scn-size', type=int, default=0,
+                        help='Chargers per smart charging network (default: all)')
     args = parser.parse_args()
+    if args.chargers < 1 or args.port + args.chargers - 1 > 65535:
+        parser.error("--chargers must fit in the port range")
+    overrides = load_overrides(args.registers) if args.registers else None
+    faults = load_overrides(args.faults) if args.faults else None
     
-    asyncio.run(run_server(args.port))
+    asyncio.run(run_server(
+        args.port, args.chargers, args.sockets, overrides, faults, args.seed, args.speed, args.scn_size
+    ))
 
 if __name__ == "__main__":
     main()
@@ -6,11 +6,19 @@ reads data from the charger. If these tests pass, the HA integration should
 work correctly against the simulator.
 
 Based on: alfen_modbus/custom_components/alfen_modbus/__init__.py
+
+With --hub the real AlfenModbusHub is checked instead, against simulated
+chargers and stations it starts itself (requires homeassistant, run from
+the simulator directory):
+  python smoke_test_ha.py --hub
 """
 import asyncio
+import json
 import logging
 import struct
+import time
 import argparse
+from datetime import datetime, timedelta
 from pymodbus.client import AsyncModbusTcpClient
 
 # Configuration - matches HA integration defaults
@@ -404,13 +412,561 @@ async def run_smoke_tests(port):
         return True
 
 
+# ============================================================================
+# Hub Checks - The integration itself against in-process simulators
+# ============================================================================
+
+# Request timeout of the hub clients in the hub checks (seconds), instead of
+# the 3 s and 3 retries of pymodbus
+HUB_CHECK_TIMEOUT = 0.2
+
+
+def create_hub(name, port, fleet=None, read_scn=False, max_in_flight=1, hass=None):
+    """Create a hub as the integration does, with short request timeouts."""
+    from benchmark import HOST, StubHass
+    from custom_components.alfen_modbus import AlfenModbusHub
+
+    hub = AlfenModbusHub(
+        hass or StubHass(), name, HOST, port, DEFAULT_MODBUS_ADDRESS, 5, read_scn, False, max_in_flight, fleet
+    )
+    for client in hub._connection._clients:
+        client.comm_params.timeout_connect = HUB_CHECK_TIMEOUT
+        client.ctx.retries = 0
+    if fleet is not None:
+        fleet.add_hub(hub)
+    return hub
+
+
+async def check_silent_station(result):
+    """A station that accepts connections but never answers makes the hub back off."""
+    from benchmark import HOST
+
+    log.info("\n=== Hub Check: Silent Station ===")
+
+    async def accept(reader, writer):
+        # Read the requests, never answer
+        while await reader.read(65536):
+            pass
+        writer.close()
+
+    server = await asyncio.start_server(accept, HOST, 0)
+    hub = create_hub("silent", server.sockets[0].getsockname()[1])
+    await hub.async_connect()
+    await hub.read_modbus_data()
+    result.check("Connection backs off after timeouts", hub.connection_state == "backing_off",
+                 "backing_off", hub.connection_state)
+    result.check("Keys are stale after the timeouts", hub.is_stale("socket_1_mode3state"))
+
+    start = time.perf_counter()
+    await hub.read_modbus_data()
+    elapsed = time.perf_counter() - start
+    result.check("Polls fail fast while backing off", elapsed < HUB_CHECK_TIMEOUT, f"< {HUB_CHECK_TIMEOUT}s", f"{elapsed:.3f}s")
+
+    hub.close()
+    server.close()
+
+
+async def start_stores(stores):
+    """Serves each simulator store on its own port, returns (servers, ports)."""
+    from benchmark import HOST, free_port
+    from simulator import create_server
+
+    servers = []
+    ports = []
+    for store in stores:
+        port = free_port()
+        server = create_server(store, (HOST, port))
+        await server.serve_forever(background=True)
+        servers.append(server)
+        ports.append(port)
+    return servers, ports
+
+
+def scn_reads(hub):
+    """Return how often the hub read the SCN block itself."""
+    return sum(
+        stats["hits"] + stats["misses"]
+        for block, stats in hub.block_stats.items()
+        if block.startswith(f"{DEFAULT_MODBUS_ADDRESS}:1400+")
+    )
+
+
+async def check_scn_read_once(result):
+    """The stations of a network share the SCN values one elected station read."""
+    import random
+    from custom_components.alfen_modbus import AlfenFleet
+    from simulator import create_store, update_network, SocketSession, ADDRESS_PRODUCT, ADDRESS_SOCKET_1
+
+    log.info("\n=== Hub Check: SCN Read Once Per Network ===")
+    stores = [create_store(index) for index in range(4)]
+    sessions = [
+        SocketSession(store[ADDRESS_PRODUCT], store[ADDRESS_SOCKET_1], random.Random(index))
+        for index, store in enumerate(stores)
+    ]
+    update_network("SCN1", [store[ADDRESS_PRODUCT] for store in stores], sessions)
+    servers, ports = await start_stores(stores)
+
+    fleet = AlfenFleet(None)
+    hubs = [create_hub(f"scn{index}", port, fleet, read_scn=True) for index, port in enumerate(ports)]
+    # The first poll reads the identification, with it every station reads
+    # the SCN block once
+    for hub in hubs:
+        await hub.read_modbus_data()
+    before = [scn_reads(hub) for hub in hubs]
+    for hub in hubs:
+        await hub.read_modbus_data()
+    after = [scn_reads(hub) for hub in hubs]
+    reads = sum(after) - sum(before)
+    result.check("SCN block read once per poll round", reads == 1, 1, reads)
+    result.check("SCN sockets decoded", hubs[0].data.get("scnSockets") == 4, 4, hubs[0].data.get("scnSockets"))
+    current = sum(session.currents[0] for session in sessions)
+    result.check_range("SCN current L1 decoded", round(hubs[0].data.get("scnCurrentL1", 0), 1),
+                       round(current, 1) - 0.1, round(current, 1) + 0.1)
+    keys = ("scnName", "scnSockets", "scnCurrentL1", "scnMaxCurrentL1", "scnSafeCurrent")
+    result.check(
+        "Every station has the values of the network",
+        all(all(hub.data.get(key) == hubs[0].data.get(key) for key in keys) for hub in hubs),
+    )
+
+    for hub in hubs:
+        hub.close()
+    for server in servers:
+        await server.shutdown()
+
+
+async def check_stale_keys(result):
+    """The keys of a read that failed are stale until it succeeds again."""
+    from simulator import create_store, ADDRESS_SOCKET_1
+
+    log.info("\n=== Hub Check: Stale Keys ===")
+    faults = {"*": {str(ADDRESS_SOCKET_1): {"exceptions": [{"start": 300, "end": 1215, "code": 4}]}}}
+    store = create_store(faults=faults)
+    servers, ports = await start_stores([store])
+    hub = create_hub("stale", ports[0])
+
+    await hub.read_modbus_data()
+    result.check("Socket keys stale after a failed read", hub.is_stale("socket_1_mode3state"))
+    result.check("Station keys of a good read are not stale", not hub.is_stale("platformType"))
+    result.check("Connection stays up on exception responses", hub.connection_state == "connected",
+                 "connected", hub.connection_state)
+
+    store[ADDRESS_SOCKET_1].faults = {}
+    await hub.read_modbus_data()
+    result.check("Socket keys fresh after the next read succeeded", not hub.is_stale("socket_1_mode3state"))
+
+    hub.close()
+    await servers[0].shutdown()
+
+
+async def check_faulty_device_backoff(result):
+    """A station that drops every connection makes the hub back off."""
+    from simulator import create_store, ADDRESS_PRODUCT
+
+    log.info("\n=== Hub Check: Faulty Device Backoff ===")
+    faults = {"*": {str(ADDRESS_PRODUCT): {"disconnect_after": 1}}}
+    servers, ports = await start_stores([create_store(faults=faults)])
+    hub = create_hub("faulty", ports[0])
+
+    await hub.async_connect()
+    await hub.read_modbus_data()
+    result.check("Connection backs off", hub.connection_state == "backing_off",
+                 "backing_off", hub.connection_state)
+    result.check("Station keys are stale", hub.is_stale("platformType"))
+
+    hub.close()
+    await servers[0].shutdown()
+
+
+async def wait_for_writes(hub):
+    """Wait until the queued register writes of the hub are written and re-read."""
+    while hub._write_tasks:
+        await asyncio.gather(*hub._write_tasks.values())
+
+
+async def check_write_dedup(result):
+    """Queued writes are coalesced, a write of the value the register holds is skipped."""
+    from simulator import create_store, encode_float, read_struct, write_struct, ADDRESS_SOCKET_1, FLOAT
+
+    log.info("\n=== Hub Check: Write Coalescing ===")
+    store = create_store()
+    device = store[ADDRESS_SOCKET_1]
+    servers, ports = await start_stores([store])
+    hub = create_hub("writes", ports[0])
+    writes = []
+    write_registers = hub.write_registers
+
+    async def count_writes(unit, address, payload):
+        writes.append((unit, address))
+        return await write_registers(unit, address, payload)
+
+    hub.write_registers = count_writes
+    await hub.read_modbus_data()
+
+    hub.async_queue_write(ADDRESS_SOCKET_1, 1210, encode_float(10.0))
+    hub.async_queue_write(ADDRESS_SOCKET_1, 1210, encode_float(16.0))
+    await wait_for_writes(hub)
+    result.check("Writes within the debounce are coalesced", len(writes) == 1, 1, len(writes))
+    max_current = read_struct(device, 1210, FLOAT)[0]
+    result.check("The last queued value is written", max_current == 16.0, 16.0, max_current)
+
+    hub.async_queue_write(ADDRESS_SOCKET_1, 1210, encode_float(16.0))
+    await wait_for_writes(hub)
+    result.check("The acknowledged value is not written again", len(writes) == 1, 1, len(writes))
+
+    # Another client lowers the max current, the next poll reads it back
+    write_struct(device, 1210, FLOAT, 10.0)
+    await hub.read_modbus_data()
+    hub.async_queue_write(ADDRESS_SOCKET_1, 1210, encode_float(16.0))
+    await wait_for_writes(hub)
+    max_current = read_struct(device, 1210, FLOAT)[0]
+    result.check("The value is written again after an external change", max_current == 16.0, 16.0, max_current)
+
+    hub.close()
+    await servers[0].shutdown()
+
+
+async def run_sessions(sessions, stop):
+    """Advance the simulated sockets in real time until stop is set."""
+    last = time.monotonic()
+    while not stop.is_set():
+        await asyncio.sleep(0.1)
+        now = time.monotonic()
+        for session in sessions:
+            session.update(now - last)
+        last = now
+
+
+async def check_keepalive(result):
+    """The max current is rewritten before its valid time runs out."""
+    import random
+    from custom_components.alfen_modbus.const import KEEPALIVE_MARGIN, MAX_CURRENT_S, VALID_TIME_S
+    from simulator import create_store, encode_float, write_struct, SocketSession, ADDRESS_PRODUCT, ADDRESS_SOCKET_1, STATUS
+
+    log.info("\n=== Hub Check: Max Current Keepalive ===")
+    store = create_store()
+    device = store[ADDRESS_SOCKET_1]
+    # A short valid time puts the keepalive a second after the first read
+    write_struct(device, 1201, STATUS, b"A", 16.0, KEEPALIVE_MARGIN + 1)
+    session = SocketSession(store[ADDRESS_PRODUCT], device, random.Random(0))
+    stop = asyncio.Event()
+    simulation = asyncio.ensure_future(run_sessions([session], stop))
+    servers, ports = await start_stores([store])
+    hub = create_hub("keepalive", ports[0])
+    keepalives = []
+
+    def keepalive():
+        keepalives.append(time.monotonic())
+        hub.async_queue_write(ADDRESS_SOCKET_1, 1210, encode_float(16.0), force=True)
+
+    def update():
+        pass
+
+    hub.async_add_alfen_sensor(update, keepalive, key=MAX_CURRENT_S + "1", socket=1)
+    read = time.monotonic()
+    await hub.read_modbus_data()
+    deadline = read + hub.data[VALID_TIME_S + "1"]
+    await asyncio.sleep(2)
+    await wait_for_writes(hub)
+    result.check("Keepalive fired once", len(keepalives) == 1, 1, len(keepalives))
+    result.check("Keepalive fired before the valid time ran out",
+                 bool(keepalives) and keepalives[0] < deadline, f"< {deadline:.1f}", keepalives[:1])
+
+    await asyncio.sleep(0.2)
+    await hub.read_modbus_data()
+    valid_time = hub.data[VALID_TIME_S + "1"]
+    result.check_range("Valid time restarted by the rewrite", valid_time, KEEPALIVE_MARGIN + 2, 60)
+    margin = hub.data.get("socket_1_keepaliveMargin")
+    result.check("Keepalive margin recorded", margin is not None and margin > 0, "> 0", margin)
+
+    stop.set()
+    await simulation
+    # Removing the last entity stops the timers and closes the hub
+    hub.async_remove_alfen_sensor(update, keepalive, key=MAX_CURRENT_S + "1")
+    await servers[0].shutdown()
+
+
+async def check_keepalive_retry(result):
+    """A rewrite that does not get through is retried with a growing interval, up to a limit."""
+    import custom_components.alfen_modbus as integration
+    from custom_components.alfen_modbus.const import KEEPALIVE_MARGIN, KEEPALIVE_MAX_RETRIES, MAX_CURRENT_S
+    from simulator import create_store, encode_float, write_struct, ADDRESS_SOCKET_1, STATUS
+
+    log.info("\n=== Hub Check: Max Current Keepalive Retry ===")
+    faults = {"*": {str(ADDRESS_SOCKET_1): {}}}
+    store = create_store(faults=faults)
+    device = store[ADDRESS_SOCKET_1]
+    write_struct(device, 1201, STATUS, b"A", 16.0, KEEPALIVE_MARGIN + 1)
+    servers, ports = await start_stores([store])
+    hub = create_hub("retry", ports[0])
+    keepalives = []
+
+    def keepalive():
+        keepalives.append(time.monotonic())
+        hub.async_queue_write(ADDRESS_SOCKET_1, 1210, encode_float(16.0), force=True)
+
+    def update():
+        pass
+
+    hub.async_add_alfen_sensor(update, keepalive, key=MAX_CURRENT_S + "1", socket=1)
+    # Retry every 0.2 s instead of every 5 s, doubling from there
+    min_interval = integration.KEEPALIVE_MIN_INTERVAL
+    integration.KEEPALIVE_MIN_INTERVAL = 0.2
+    try:
+        await hub.read_modbus_data()
+        # The station refuses the writes, and the status reads with them
+        device.faults = {"exceptions": [{"start": 1210, "end": 1211, "code": 4}]}
+        await asyncio.sleep(6)
+    finally:
+        integration.KEEPALIVE_MIN_INTERVAL = min_interval
+    result.check("Keepalive retried up to the limit", len(keepalives) == KEEPALIVE_MAX_RETRIES,
+                 KEEPALIVE_MAX_RETRIES, len(keepalives))
+    intervals = [later - earlier for earlier, later in zip(keepalives, keepalives[1:])]
+    result.check("Retry interval grows", all(later > earlier for earlier, later in zip(intervals, intervals[1:])),
+                 "growing", [round(interval, 2) for interval in intervals])
+
+    await wait_for_writes(hub)
+    hub.async_remove_alfen_sensor(update, keepalive, key=MAX_CURRENT_S + "1")
+    await servers[0].shutdown()
+
+
+async def check_overlapping_polls(result):
+    """A refresh while a poll is running waits for it instead of polling again."""
+    from simulator import create_store
+
+    log.info("\n=== Hub Check: Overlapping Polls ===")
+    servers, ports = await start_stores([create_store()])
+    hub = create_hub("overlap", ports[0])
+
+    def update():
+        pass
+
+    # The first entity schedules the initial poll, the start of the entry
+    # and the first scheduled poll come on top of it
+    unsubscribe = hub.async_subscribe("socket_1_mode3state", update)
+    await asyncio.gather(hub.async_refresh_modbus_data(), hub.async_refresh_modbus_data())
+    await asyncio.sleep(0.1)
+    clock_reads = hub.block_stats[f"{DEFAULT_MODBUS_ADDRESS}:168+11"]
+    polls = clock_reads["hits"] + clock_reads["misses"]
+    result.check("Overlapping refreshes poll once", polls == 1, 1, polls)
+
+    unsubscribe()
+    await servers[0].shutdown()
+
+
+# Station clock registers 168-178: date, time, uptime in ms, UTC offset in minutes
+CLOCK = struct.Struct(">6hQh")
+
+
+class MemoryStore:
+    """Keeps the saved hub data in memory, in place of the Home Assistant Store."""
+
+    def __init__(self):
+        self.data = None
+
+    async def async_load(self):
+        return self.data
+
+    async def async_save(self, data):
+        # Saved as JSON, like the Store does
+        self.data = json.loads(json.dumps(data))
+
+    def async_delay_save(self, data_func, delay=0):
+        self.data = json.loads(json.dumps(data_func()))
+
+
+def set_station(store, clock, uptime, energy):
+    """Set the station clock and the energy counter of socket 1 of a simulated charger."""
+    from simulator import write_struct, ADDRESS_PRODUCT, ADDRESS_SOCKET_1, REAL_ENERGY
+
+    write_struct(
+        store[ADDRESS_PRODUCT], 168, CLOCK,
+        clock.year, clock.month, clock.day, clock.hour, clock.minute, clock.second,
+        int(uptime.total_seconds() * 1000), 60,
+    )
+    write_struct(store[ADDRESS_SOCKET_1], 362, REAL_ENERGY, energy, 0.0, 0.0, energy)
+
+
+async def restart_hub(port, saved):
+    """Start a hub from the saved data, as the integration does after a restart."""
+    # The station unit answers late, the socket reads would come in first
+    hub = create_hub("restart", port, max_in_flight=2)
+    await hub.async_restore(saved)
+    return hub
+
+
+async def check_restart(result):
+    """The data of the last run is restored, its running session checked against the station."""
+    from simulator import create_store, write_struct, ADDRESS_PRODUCT, ADDRESS_SOCKET_1, STATUS
+
+    log.info("\n=== Hub Check: Restart ===")
+    faults = {"*": {str(ADDRESS_PRODUCT): {"latency": {"value": 50}}}}
+    store = create_store(faults=faults)
+    write_struct(store[ADDRESS_SOCKET_1], 1201, STATUS, b"C2", 16.0, 60)
+    started = datetime(2026, 10, 1, 12, 0, 0)
+    set_station(store, started, timedelta(hours=1), 1000.0)
+    servers, ports = await start_stores([store])
+    saved = MemoryStore()
+
+    hub = await restart_hub(ports[0], saved)
+    # The session starts at the first change of the socket after the clock
+    # was read, the valid time counting down is one
+    await hub.read_modbus_data()
+    write_struct(store[ADDRESS_SOCKET_1], 1201, STATUS, b"C2", 16.0, 59)
+    await hub.read_modbus_data()
+    result.check("Session started", hub.data.get("socket_1_carcharging") == 1, 1, hub.data.get("socket_1_carcharging"))
+    await hub.async_save()
+    hub.close()
+
+    # Home Assistant restarts, the car is still charging
+    set_station(store, started + timedelta(minutes=10), timedelta(hours=1, minutes=10), 1500.0)
+    hub = await restart_hub(ports[0], saved)
+    result.check("Identification restored before the first poll", hub.data.get("serial") == "ACE0108752",
+                 "ACE0108752", hub.data.get("serial"))
+    await hub.read_modbus_data()
+    result.check("Restored session continues", hub.data.get("socket_1_currentSession") == 500.0,
+                 500.0, hub.data.get("socket_1_currentSession"))
+    result.check("Restored session keeps its start", hub.data.get("socket_1_currentSessionDuration") == timedelta(minutes=10),
+                 timedelta(minutes=10), hub.data.get("socket_1_currentSessionDuration"))
+    await hub.async_save()
+    hub.close()
+
+    # The station rebooted while Home Assistant was down, the car charging
+    # now started a new session
+    set_station(store, started + timedelta(minutes=30), timedelta(minutes=5), 1600.0)
+    hub = await restart_hub(ports[0], saved)
+    await hub.read_modbus_data()
+    result.check("Session from before the reboot is dropped", hub.data.get("socket_1_currentSession") == 0,
+                 0, hub.data.get("socket_1_currentSession"))
+    result.check("New session starts at the station time",
+                 hub.data.get("socket_1_chargingStart") == hub.data.get("stationTime"),
+                 hub.data.get("stationTime"), hub.data.get("socket_1_chargingStart"))
+    hub.close()
+    await servers[0].shutdown()
+
+
+async def check_session_ledger(result):
+    """Finished sessions are recorded and queried by a date range in the configured time zone."""
+    import os
+    import tempfile
+    import zoneinfo
+    from types import SimpleNamespace
+    from homeassistant.util import dt as dt_util
+    from benchmark import StubHass
+    from custom_components.alfen_modbus import async_setup, QUERY_SESSIONS_SCHEMA
+    from custom_components.alfen_modbus.const import DATA_LEDGER, POLL_GROUP_ENERGY, SERVICE_QUERY_SESSIONS
+    from simulator import create_store, write_struct, ADDRESS_SOCKET_1, STATUS
+
+    log.info("\n=== Hub Check: Session Ledger ===")
+    directory = tempfile.TemporaryDirectory()
+    hass = StubHass()
+    jobs = []
+    services = {}
+
+    def add_executor_job(target, *args):
+        job = hass.loop.run_in_executor(None, target, *args)
+        jobs.append(job)
+        return job
+
+    hass.async_add_executor_job = add_executor_job
+    hass.data = {}
+    hass.config = SimpleNamespace(path=lambda name: os.path.join(directory.name, name))
+    hass.bus = SimpleNamespace(async_listen_once=lambda event, listener: None)
+    hass.services = SimpleNamespace(
+        async_register=lambda domain, service, handler, **kwargs: services.__setitem__(service, handler)
+    )
+    await async_setup(hass, {})
+    ledger = hass.data[DATA_LEDGER]
+
+    store = create_store()
+    write_struct(store[ADDRESS_SOCKET_1], 1201, STATUS, b"C2", 16.0, 60)
+    # 12:00 at UTC+1, the station clock has no time zone of its own
+    started = datetime(2026, 10, 1, 12, 0, 0)
+    set_station(store, started, timedelta(hours=1), 1000.0)
+    servers, ports = await start_stores([store])
+    hub = create_hub("ledger", ports[0], hass=hass)
+    hub.ledger = ledger
+
+    await hub.read_modbus_data()
+    write_struct(store[ADDRESS_SOCKET_1], 1201, STATUS, b"C2", 16.0, 59)
+    await hub.read_modbus_data()
+    set_station(store, started + timedelta(minutes=30), timedelta(hours=1, minutes=30), 3000.0)
+    write_struct(store[ADDRESS_SOCKET_1], 1201, STATUS, b"B2", 16.0, 29)
+    # Half an hour later the energy counters are due again
+    hub._last_poll.pop(POLL_GROUP_ENERGY)
+    await hub.read_modbus_data()
+    await asyncio.gather(*jobs)
+
+    async def query(**data):
+        return await services[SERVICE_QUERY_SESSIONS](SimpleNamespace(data=QUERY_SESSIONS_SCHEMA(data)))
+
+    # Home Assistant is set to another time zone than the operating system,
+    # the session started at 20:00 in Tokyo
+    time_zone = dt_util.get_default_time_zone()
+    dt_util.set_default_time_zone(zoneinfo.ZoneInfo("Asia/Tokyo"))
+    try:
+        response = await query(start="2026-10-01 19:30:00", end="2026-10-01 20:30:00")
+        sessions = response.get("sessions", [])
+        result.check("Session found in the range", len(sessions) == 1, 1, len(sessions))
+        if sessions:
+            result.check("Session energy recorded", sessions[0]["energy"] == 2000.0, 2000.0, sessions[0]["energy"])
+            result.check("Session times in UTC", sessions[0]["start"] == "2026-10-01T11:00:00+00:00",
+                         "2026-10-01T11:00:00+00:00", sessions[0]["start"])
+        totals = response["totals"]
+        result.check("Totals per socket", [(total["station"], total["socket"], total["sessions"]) for total in totals] == [("ledger", 1, 1)],
+                     [("ledger", 1, 1)], totals)
+
+        response = await query(start="2026-10-01 11:30:00", end="2026-10-01 12:30:00", sessions=False)
+        result.check("No session outside the range", response == {"totals": []}, {"totals": []}, response)
+    finally:
+        dt_util.set_default_time_zone(time_zone)
+
+    await hass.async_add_executor_job(ledger.close)
+    directory.cleanup()
+    hub.close()
+    await servers[0].shutdown()
+
+
+async def run_hub_checks():
+    """Run the checks of the hub against in-process simulators."""
+    log.info("=" * 70)
+    log.info("Alfen Modbus Hub Checks")
+    log.info("=" * 70)
+    # pymodbus logs every request that times out
+    logging.getLogger("pymodbus").setLevel(logging.CRITICAL)
+
+    result = SmokeTestResult()
+    await check_silent_station(result)
+    await check_scn_read_once(result)
+    await check_stale_keys(result)
+    await check_faulty_device_backoff(result)
+    await check_write_dedup(result)
+    await check_keepalive(result)
+    await check_keepalive_retry(result)
+    await check_overlapping_polls(result)
+    await check_restart(result)
+    await check_session_ledger(result)
+
+    log.info("\n" + "=" * 70)
+    log.info(f"  Passed: {result.passed}")
+    log.info(f"  Failed: {result.failed}")
+    for err in result.errors:
+        log.error(err)
+    log.info("=" * 70)
+    return result.failed == 0
+
+
 def main():
     parser = argparse.ArgumentParser(description='HA Integration Smoke Tests')
     parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT,
                         help=f'TCP port (default: {DEFAULT_PORT})')
+    parser.add_argument('--hub', action='store_true',
+                        help='Check the integration hub against in-process simulators')
     args = parser.parse_args()
     
-    success = asyncio.run(run_smoke_tests(args.port))
+    if args.hub:
+        success = asyncio.run(run_hub_checks())
+    else:
+        success = asyncio.run(run_smoke_tests(args.port))
     exit(0 if success else 1)
 
 
@@ -2,12 +2,35 @@
 Test script for Alfen Eve Single Pro Modbus Simulator
 
 Verifies the simulator responds correctly with expected values.
+
+With --in-process the scale mode, the fault injection and the charging
+sessions are checked against chargers started in this process instead.
 """
 import asyncio
 import logging
 import struct
 import argparse
+import random
+import socket
 from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
+
+from simulator import (
+    create_server,
+    create_store,
+    encode_float,
+    read_struct,
+    update_network,
+    SocketSession,
+    ADDRESS_PRODUCT,
+    ADDRESS_SOCKET_1,
+    CONTROL,
+    MAX_CURRENT_VALID_TIME,
+    REAL_ENERGY,
+    SCN,
+    SERIAL_NUMBER,
+    STATUS,
+)
 
 # Default Configuration - matches real Alfen hardware
 DEFAULT_PORT = 502
@@ -191,13 +214,186 @@ async def run_test(port):
     
     return success
 
+# =========================================================================
+# In-process checks
+# =========================================================================
+
+def free_port():
+    """Return a TCP port that is free on the loopback interface."""
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def check(name, condition, detail=""):
+    """Logs a check, returns its outcome."""
+    if condition:
+        log.info(f"✓ {name}")
+    else:
+        log.error(f"✗ {name} {detail}")
+    return condition
+
+
+async def start_chargers(stores):
+    """Serves each store on its own port, returns (servers, clients)."""
+    servers = []
+    clients = []
+    for store in stores:
+        port = free_port()
+        server = create_server(store, (HOST, port))
+        await server.serve_forever(background=True)
+        servers.append(server)
+        client = AsyncModbusTcpClient(HOST, port=port, timeout=0.5, retries=0)
+        await client.connect()
+        clients.append(client)
+    return servers, clients
+
+
+async def stop_chargers(servers, clients):
+    for client in clients:
+        client.close()
+    for server in servers:
+        await server.shutdown()
+
+
+async def test_scale_mode():
+    """Every charger of one process answers on its own port with its own serial."""
+    log.info("=" * 60)
+    log.info("Testing scale mode")
+    log.info("=" * 60)
+    overrides = {"1": {"200": {"1105": {"uint16": 2}}}}
+    stores = [create_store(index, 1, overrides) for index in range(3)]
+    servers, clients = await start_chargers(stores)
+    success = True
+    serials = []
+    for index, client in enumerate(clients):
+        rr = await client.read_holding_registers(157, count=11, device_id=ADDRESS_PRODUCT)
+        serials.append(decode_string(rr.registers, 22))
+        rr = await client.read_holding_registers(1105, count=1, device_id=ADDRESS_PRODUCT)
+        expected = 2 if index == 1 else 1
+        success &= check(f"Charger {index} reports {expected} socket(s)", rr.registers[0] == expected, rr.registers)
+    success &= check(
+        "Every charger has its own serial number",
+        serials == [f"ACE{SERIAL_NUMBER + index:07d}" for index in range(3)],
+        serials,
+    )
+    await stop_chargers(servers, clients)
+    return success
+
+
+async def test_fault_injection():
+    """Configured exceptions, drops and disconnects reach the client."""
+    log.info("=" * 60)
+    log.info("Testing fault injection")
+    log.info("=" * 60)
+    faults = {
+        "0": {"1": {"exceptions": [{"start": 1200, "end": 1215, "code": 6}]}},
+        "1": {"1": {"drop": 1.0}},
+        "2": {"1": {"disconnect_after": 1}},
+    }
+    rng = random.Random(1)
+    stores = [create_store(index, 1, faults=faults, rng=rng) for index in range(3)]
+    servers, clients = await start_chargers(stores)
+    success = True
+
+    rr = await clients[0].read_holding_registers(1200, count=16, device_id=ADDRESS_SOCKET_1)
+    success &= check("Exception code for the configured range",
+                     rr.isError() and rr.exception_code == 6, rr)
+    rr = await clients[0].read_holding_registers(300, count=10, device_id=ADDRESS_SOCKET_1)
+    success &= check("Registers outside the range are served", not rr.isError(), rr)
+    rr = await clients[0].read_holding_registers(1100, count=6, device_id=ADDRESS_PRODUCT)
+    success &= check("Units without faults are served", not rr.isError(), rr)
+
+    for index, name in ((1, "Dropped request"), (2, "Disconnected request")):
+        try:
+            rr = await clients[index].read_holding_registers(300, count=10, device_id=ADDRESS_SOCKET_1)
+            answered = not rr.isError()
+        except ModbusException:
+            answered = False
+        success &= check(f"{name} is not answered", not answered)
+
+    await stop_chargers(servers, clients)
+    return success
+
+
+def test_sessions():
+    """A socket walks through a charging session and applies the valid time of its max current."""
+    log.info("=" * 60)
+    log.info("Testing charging sessions")
+    log.info("=" * 60)
+    store = create_store()
+    product = store[ADDRESS_PRODUCT]
+    device = store[ADDRESS_SOCKET_1]
+    # An hour of charging per simulated second
+    session = SocketSession(product, device, random.Random(1), speed=3600)
+    success = True
+
+    energy = read_struct(device, 362, REAL_ENERGY)[3]
+    states = []
+    for _ in range(10):
+        session.update(1)
+        states.append(read_struct(device, 1201, STATUS)[0].rstrip(b"\x00").decode())
+    cycle = ["C2", "B2", "A", "B1"]
+    transitions = [(old, new) for old, new in zip(["C2"] + states, states) if old != new]
+    success &= check(
+        "Sessions walk C2 -> B2 -> A -> B1 -> C2",
+        set(states) == set(cycle)
+        and all(cycle.index(new) == (cycle.index(old) + 1) % len(cycle) for old, new in transitions),
+        states,
+    )
+    success &= check("Energy increased while charging", read_struct(device, 362, REAL_ENERGY)[3] > energy)
+
+    session.update(MAX_CURRENT_VALID_TIME)
+    _, applied, valid_time = read_struct(device, 1201, STATUS)
+    safe_current = read_struct(device, 1210, CONTROL)[1]
+    success &= check("Safe current applies once the valid time ran out",
+                     valid_time == 0 and applied == safe_current, (valid_time, applied))
+    asyncio.run(device.async_setValues(3, 1210, encode_float(10.0)))
+    session.update(1)
+    _, applied, valid_time = read_struct(device, 1201, STATUS)
+    success &= check("Writing the max current restarts the valid time",
+                     valid_time == MAX_CURRENT_VALID_TIME and applied == 10.0, (valid_time, applied))
+
+    # Two stations of one smart charging network report the same values
+    stores = [create_store(index) for index in range(2)]
+    sessions = [SocketSession(s[ADDRESS_PRODUCT], s[ADDRESS_SOCKET_1], random.Random(index)) for index, s in enumerate(stores)]
+    update_network("SCN1", [s[ADDRESS_PRODUCT] for s in stores], sessions)
+    values = [read_struct(s[ADDRESS_PRODUCT], 1400, SCN) for s in stores]
+    success &= check("Network stations report the same SCN registers", values[0] == values[1])
+    success &= check("SCN registers count the network sockets", values[0][1] == 2, values[0][1])
+    success &= check(
+        "SCN currents are the sum of the sessions",
+        abs(values[0][2] - sum(session.currents[0] for session in sessions)) < 0.01,
+    )
+    return success
+
+
+async def run_in_process_tests():
+    # pymodbus logs the injected faults
+    logging.getLogger("pymodbus").setLevel(logging.CRITICAL)
+    success = await test_scale_mode()
+    success &= await test_fault_injection()
+    success &= await asyncio.get_running_loop().run_in_executor(None, test_sessions)
+    log.info("=" * 60)
+    if success:
+        log.info("=== ALL TESTS PASSED ===")
+    else:
+        log.error("=== SOME TESTS FAILED ===")
+    return success
+
+
 def main():
     parser = argparse.ArgumentParser(description='Test Alfen Eve Simulator')
     parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT,
                         help=f'TCP port to connect to (default: {DEFAULT_PORT})')
+    parser.add_argument('--in-process', action='store_true',
+                        help='Check scale mode, faults and sessions against chargers started in this process')
     args = parser.parse_args()
     
-    result = asyncio.run(run_test(args.port))
+    if args.in_process:
+        result = asyncio.run(run_in_process_tests())
+    else:
+        result = asyncio.run(run_test(args.port))
     exit(0 if result else 1)
 
 if __name__ == "__main__":